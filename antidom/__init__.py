@@ -1,7 +1,13 @@
+import os
+
 from antidom.resource import Resource
 from antidom.view import view
 from antidom.viewdom import html, VDOM, VDOMNode
 
+if os.environ.get('ANTIDOM_TEMPLATE_CACHE'):
+    from antidom.precompile import load_cache
+    load_cache(os.environ['ANTIDOM_TEMPLATE_CACHE'])
+
 __all__ = [
     'view',
     'html',
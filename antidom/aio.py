@@ -0,0 +1,112 @@
+"""Render VDOM whose components await data.
+
+Mirrors ``render`` and ``render_gen`` from ``antidom.viewdom``, except that a
+component's ``__call__`` or ``__vdom__`` may be a coroutine. Siblings are
+resolved concurrently, so components waiting on I/O overlap.
+"""
+from __future__ import annotations
+
+import asyncio
+import inspect
+from collections.abc import ByteString, Iterable
+from typing import Any, AsyncIterator, Callable, Mapping, Sequence
+
+from antidote import world
+
+from .viewdom import DEFAULT_CHUNK_SIZE, VDOM, VDOMNode, render_chunks
+
+
+async def relaxed_call_async(
+        callable_: Callable[..., Any],
+        props: Mapping[str, object] | None = None,
+) -> Any:
+    """Like ``relaxed_call``, awaiting the component if it is a coroutine."""
+    memo = getattr(callable_, "__memoize__", None)
+    if memo is not None:
+        key, resource, cached = memo.lookup(props or {})
+        if cached is not None:
+            return cached
+        value = world.get(callable_)  # type: ignore
+        value = value() if callable(value) else value.__vdom__()
+        if inspect.isawaitable(value):
+            value = await value
+        if key is None:
+            return value
+        # Resolved before storing, as rendering it to a string would call
+        # nested async components synchronously.
+        return memo.store(key, resource, await resolve(value))
+
+    target = world.get(callable_)  # type: ignore
+    if callable(target):
+        result = target()
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+    return target
+
+
+async def resolve(value: Any) -> Any:
+    """Replace every component in a VDOM with what it renders to.
+
+    The result only holds strings, plain nodes and lists, so it can be
+    rendered synchronously. Nodes without components are returned as is.
+    """
+    if isinstance(value, (str, ByteString)) or hasattr(value, '__html__'):
+        # Including those already rendered, e.g. a CompactVDOM.
+        return value
+    if isinstance(value, VDOMNode):
+        if callable(value.tag):
+            return await resolve(await relaxed_call_async(value.tag, value.props))
+        children = await resolve_all(value.children)
+        if all(new is old for (new, old) in zip(children, value.children)):
+            return value
+        return VDOMNode(value.tag, value.props, children)
+    if isinstance(value, Iterable):
+        return await resolve_all(value)
+    if hasattr(value, '__vdom__'):
+        vdom = value.__vdom__()
+        if inspect.isawaitable(vdom):
+            vdom = await vdom
+        return await resolve(vdom)
+    raise ValueError("Unknown flattened value")
+
+
+async def resolve_all(values: Iterable[Any]) -> list[Any]:
+    """Resolve siblings concurrently, keeping their order."""
+    items = list(values)
+    pending = [
+        index for (index, item) in enumerate(items) if not isinstance(item, str)
+    ]
+    resolved = await asyncio.gather(*(resolve(items[index]) for index in pending))
+    for index, item in zip(pending, resolved):
+        items[index] = item
+    return items
+
+
+async def render_gen_async(
+        value: Sequence[str | VDOMNode] | VDOMNode | Any,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+) -> AsyncIterator[str]:
+    """Render as an async iterator of chunks.
+
+    All top-level items start resolving at once, then each is rendered as
+    soon as it and those before it are ready.
+    """
+    if isinstance(value, (str, VDOMNode)) or not isinstance(value, Iterable):
+        value = [value]
+    tasks = [asyncio.ensure_future(resolve(item)) for item in value]
+    try:
+        for task in tasks:
+            for chunk in render_chunks(await task, chunk_size):
+                yield chunk
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+async def render_async(value: VDOM | Any) -> str:
+    """Render a VDOM with async components to a string."""
+    return "".join([chunk async for chunk in render_gen_async(value)])
+
+
+__all__ = ["render_async", "render_gen_async", "resolve", "relaxed_call_async"]
@@ -0,0 +1,164 @@
+"""Render the pages of many resources to files, e.g. for a static site.
+
+Run ``python -m antidom.batch mysite.pages:all_resources -o public`` to
+import ``mysite.pages``, call ``all_resources()`` and write the view of
+each resource it yields to ``public/<path>/index.html``. Pages are
+rendered across a pool of processes. Each worker imports the modules
+defining the views and loads the precompiled template cache once, before
+its first page.
+"""
+from __future__ import annotations
+
+import argparse
+import importlib
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterable, Sequence
+
+from .resource import Resource, resource_context
+from .view import get_view
+from .viewdom import render
+
+
+@dataclass(frozen=True)
+class BatchReport:
+    """What a batch render produced and how long it took."""
+
+    pages: int
+    bytes: int
+    seconds: float
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.seconds if self.seconds else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"rendered {self.pages} pages ({self.bytes / 1e6:.1f} MB) "
+            f"in {self.seconds:.2f}s, {self.pages_per_second:.0f} pages/s"
+        )
+
+
+def resource_path(resource: Resource) -> Path:
+    """The file a resource's page is written to, from its place in the tree."""
+    names = []
+    node: Resource | None = resource
+    while node is not None:
+        if node.name:
+            if node.name in (".", "..") or "/" in node.name or os.sep in node.name:
+                raise ValueError(f"resource name {node.name!r} can't be used in a path")
+            names.append(node.name)
+        node = node.parent
+    return Path(*reversed(names), "index.html")
+
+
+def init_worker(modules: Sequence[str] = (), template_cache: str | None = None) -> None:
+    """Prepare a process to render pages.
+
+    Importing the modules registers their views and components.
+    """
+    for module in modules:
+        importlib.import_module(module)
+    if template_cache:
+        from .precompile import load_cache
+        load_cache(template_cache)
+
+
+def write_page(resource: Resource, output_dir: str) -> int:
+    """Render the view of a resource to its file, returning the bytes written."""
+    with resource_context(resource):
+        page = render(get_view().__vdom__()).encode("utf-8")
+    path = Path(output_dir) / resource_path(resource)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(page)
+    return len(page)
+
+
+def render_batch(
+        resources: Iterable[Resource],
+        output_dir: str | os.PathLike[str],
+        processes: int | None = None,
+        modules: Sequence[str] = (),
+        template_cache: str | None = None,
+        window: int | None = None,
+) -> BatchReport:
+    """Render the view of each resource to a file under ``output_dir``.
+
+    ``processes`` of ``None`` uses one per CPU, ``0`` renders in this
+    process. Resources are consumed lazily and at most ``window`` pages
+    are in flight at once, so memory stays bounded however many there are.
+    Resources sent to workers must be picklable.
+    """
+    output = os.fspath(output_dir)
+    start = time.perf_counter()
+    pages = size = 0
+
+    if processes == 0:
+        init_worker(modules, template_cache)
+        for resource in resources:
+            size += write_page(resource, output)
+            pages += 1
+        return BatchReport(pages, size, time.perf_counter() - start)
+
+    workers = processes or os.cpu_count() or 1
+    with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=init_worker,
+            initargs=(tuple(modules), template_cache),
+    ) as executor:
+        limit = window or 4 * workers
+        pending: set[Future[int]] = set()
+        for resource in resources:
+            if len(pending) >= limit:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                size += sum(future.result() for future in done)
+                pages += len(done)
+            pending.add(executor.submit(write_page, resource, output))
+        size += sum(future.result() for future in wait(pending).done)
+        pages += len(pending)
+    return BatchReport(pages, size, time.perf_counter() - start)
+
+
+def load_resources(spec: str) -> Iterable[Resource]:
+    """Call the ``module:function`` that yields the resources to render."""
+    module_name, _, function_name = spec.partition(":")
+    if not function_name:
+        raise ValueError(f"expected module:function, got {spec!r}")
+    module = importlib.import_module(module_name)
+    resources: Iterable[Resource] = getattr(module, function_name)()
+    return resources
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="antidom-batch",
+        description="Render the view of many resources to HTML files.",
+    )
+    parser.add_argument("resources", help="module:function returning the resources")
+    parser.add_argument("-o", "--output", default="public")
+    parser.add_argument("-j", "--processes", type=int, default=None,
+                        help="worker processes, 0 to render in this process")
+    parser.add_argument("-m", "--module", action="append", default=[],
+                        help="extra module to import in each worker, e.g. views")
+    parser.add_argument("--template-cache", default=os.environ.get("ANTIDOM_TEMPLATE_CACHE"),
+                        help="precompiled template cache to load in each worker")
+    args = parser.parse_args(argv)
+
+    modules = [args.resources.partition(":")[0], *args.module]
+    report = render_batch(
+        load_resources(args.resources),
+        args.output,
+        processes=args.processes,
+        modules=modules,
+        template_cache=args.template_cache,
+    )
+    print(report)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,314 @@
+"""Shared, observable caches for parsed and compiled templates.
+
+``TemplateCache`` wraps the functions parsing and compiling templates and
+``BoundedCache`` holds rendered output, e.g. of memoized components. Both
+are listed in ``cache_stats`` once registered.
+"""
+from __future__ import annotations
+
+import threading
+import time
+import warnings
+import weakref
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from enum import Enum
+from typing import Any, Callable, Generic, Hashable, Iterable, Literal, TypeVar
+
+K = TypeVar('K', bound=Hashable)
+V = TypeVar('V')
+
+Policy = Literal["lru", "fifo"]
+
+
+@dataclass(frozen=True)
+class CacheStats:
+    """A snapshot of the counters of one cache."""
+
+    name: str
+    policy: Policy
+    maxsize: int | None
+    size: int
+    hits: int
+    misses: int
+    evictions: int
+
+    def as_dict(self) -> dict[str, object]:
+        return asdict(self)
+
+
+class TemplateCache(Generic[K, V]):
+    """A bounded cache around a function, like ``functools.lru_cache``.
+
+    ``maxsize`` of ``None`` means unbounded and ``0`` disables caching.
+    With the "lru" policy a hit refreshes an entry, with "fifo" entries are
+    evicted in the order they were added.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            build: Callable[[K], V],
+            maxsize: int | None = 128,
+            policy: Policy = "lru",
+    ) -> None:
+        self.name = name
+        self.build = build
+        self.maxsize = maxsize
+        self.policy = policy
+        self._entries: OrderedDict[K, V] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def __call__(self, key: K) -> V:
+        with self._lock:
+            try:
+                value = self._entries[key]
+            except KeyError:
+                self.misses += 1
+            else:
+                self.hits += 1
+                if self.policy == "lru":
+                    self._entries.move_to_end(key)
+                return value
+        # Build outside the lock, a duplicate build on a race is harmless.
+        value = self.build(key)
+        self.put(key, value)
+        return value
+
+    def put(self, key: K, value: V) -> None:
+        """Store a value built elsewhere, e.g. loaded from disk."""
+        with self._lock:
+            if self.maxsize == 0:
+                return
+            self._entries[key] = value
+            self._evict()
+
+    def __contains__(self, key: object) -> bool:
+        return key in self._entries
+
+    def reserve(self, count: int) -> None:
+        """Grow, if bounded, so ``count`` more entries fit without evictions.
+
+        A disabled cache, of ``maxsize`` 0, stays disabled.
+        """
+        with self._lock:
+            if self.maxsize:
+                self.maxsize = max(self.maxsize, len(self._entries) + count)
+
+    def warm(self, keys: Iterable[K]) -> None:
+        """Build the entries for these keys ahead of their first use."""
+        for key in keys:
+            if key not in self._entries:
+                self.put(key, self.build(key))
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def configure(self, maxsize: int | None, policy: Policy | None = None) -> None:
+        with self._lock:
+            self.maxsize = maxsize
+            if policy is not None:
+                self.policy = policy
+            self._evict()
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            name=self.name,
+            policy=self.policy,
+            maxsize=self.maxsize,
+            size=len(self._entries),
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+    def _evict(self) -> None:
+        if self.maxsize is None:
+            return
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+
+class BoundedCache(Generic[K, V]):
+    """A mapping evicting least recently used entries beyond ``maxsize``.
+
+    Each entry counts for one towards ``maxsize``, or for ``weigh(value)``
+    if given, e.g. ``len`` to bound the characters of HTML kept. ``size``
+    is the total. Entries expire ``ttl`` seconds after being stored, if
+    given, as told by ``clock``.
+    """
+
+    def __init__(
+            self,
+            name: str,
+            maxsize: int | None = 128,
+            ttl: float | None = None,
+            weigh: Callable[[V], int] | None = None,
+            clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.weigh = weigh
+        self.clock = clock
+        self.size = 0
+        # key -> (expiry time, weight, value)
+        self._entries: OrderedDict[K, tuple[float | None, int, V]] = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = 0
+
+    def get(self, key: K, valid: Callable[[V], bool] | None = None) -> V | None:
+        """The value for a key, or ``None`` if missing, expired or not ``valid``."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires, _, value = entry
+                if (expires is None or self.clock() < expires) and (valid is None or valid(value)):
+                    self.hits += 1
+                    self._entries.move_to_end(key)
+                    return value
+                self._remove(key)
+            self.misses += 1
+        return None
+
+    def put(self, key: K, value: V) -> None:
+        """Store a value, unless it alone weighs more than ``maxsize``."""
+        weight = 1 if self.weigh is None else self.weigh(value)
+        with self._lock:
+            self._remove(key)
+            if self.maxsize is not None and weight > self.maxsize:
+                return
+            expires = None if self.ttl is None else self.clock() + self.ttl
+            self._entries[key] = (expires, weight, value)
+            self.size += weight
+            while self.maxsize is not None and self.size > self.maxsize:
+                _, (_, evicted, _) = self._entries.popitem(last=False)
+                self.size -= evicted
+                self.evictions += 1
+
+    def discard(self, predicate: Callable[[K, V], bool]) -> None:
+        """Remove the entries for which ``predicate(key, value)`` is true."""
+        with self._lock:
+            for key in [key for (key, entry) in self._entries.items() if predicate(key, entry[2])]:
+                self._remove(key)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self.size = 0
+
+    def stats(self) -> CacheStats:
+        return CacheStats(
+            name=self.name,
+            policy="lru",
+            maxsize=self.maxsize,
+            size=self.size,
+            hits=self.hits,
+            misses=self.misses,
+            evictions=self.evictions,
+        )
+
+    def _remove(self, key: K) -> None:
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.size -= entry[1]
+
+
+# Registered caches by name. They are kept by whoever uses them, e.g. a
+# module or a component class, so they drop out of here with it.
+caches: weakref.WeakValueDictionary[str, TemplateCache[Any, Any] | BoundedCache[Any, Any]] = (
+    weakref.WeakValueDictionary()
+)
+
+
+def register_cache(cache: TemplateCache[Any, Any] | BoundedCache[Any, Any]) -> None:
+    """List a cache in ``cache_stats``, suffixing its name if it is taken."""
+    name, count = cache.name, 1
+    while caches.get(name, cache) is not cache:
+        count += 1
+        name = f"{cache.name}#{count}"
+    caches[name] = cache
+
+
+def template_cache(
+        name: str,
+        maxsize: int | None = 128,
+        policy: Policy = "lru",
+) -> Callable[[Callable[[K], V]], TemplateCache[K, V]]:
+    """Decorate a function to cache it in the shared registry."""
+
+    def decorate(build: Callable[[K], V]) -> TemplateCache[K, V]:
+        cache = TemplateCache(name, build, maxsize=maxsize, policy=policy)
+        register_cache(cache)
+        return cache
+
+    return decorate
+
+
+def tag_cache(
+        shared: TemplateCache[K, V],
+        cache: TemplateCache[K, V] | None,
+        cache_maxsize: int | None,
+) -> TemplateCache[K, V]:
+    """The cache for a tag function given the ``cache`` it was passed.
+
+    That cache is registered, for ``cache_stats``. Without one the
+    ``shared`` cache is used, or a registered copy of it sized by the
+    deprecated ``cache_maxsize`` argument.
+    """
+    if cache_maxsize is not None:
+        warnings.warn(
+            "cache_maxsize is deprecated, pass cache=TemplateCache(...) instead",
+            DeprecationWarning,
+            stacklevel=3,
+        )
+        if cache is None:
+            cache = TemplateCache(shared.name, shared.build, maxsize=cache_maxsize, policy=shared.policy)
+    if cache is None:
+        return shared
+    register_cache(cache)
+    return cache
+
+
+class Keep(Enum):
+    """Leave a setting as it is, see ``configure_caches``."""
+
+    KEEP = "keep"
+
+
+KEEP = Keep.KEEP
+
+
+def configure_caches(maxsize: int | None | Keep = KEEP, policy: Policy | None = None) -> None:
+    """Resize, and optionally change the policy of, every template cache."""
+    for cache in list(caches.values()):
+        if isinstance(cache, TemplateCache):
+            cache.configure(maxsize=cache.maxsize if maxsize is KEEP else maxsize, policy=policy)
+
+
+def clear_caches() -> None:
+    """Empty every registered cache."""
+    for cache in list(caches.values()):
+        cache.clear()
+
+
+def cache_stats() -> dict[str, dict[str, object]]:
+    """The statistics of every registered cache, ready to export."""
+    return {name: cache.stats().as_dict() for (name, cache) in list(caches.items())}
+
+
+__all__ = [
+    "BoundedCache",
+    "CacheStats",
+    "TemplateCache",
+    "register_cache",
+    "tag_cache",
+    "template_cache",
+    "configure_caches",
+    "clear_caches",
+    "cache_stats",
+]
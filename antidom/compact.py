@@ -0,0 +1,281 @@
+"""A VDOM stored in flat arrays, for trees too large for a node per element.
+
+A ``VDOMNode`` holds its own props dict and children list, so a table of
+thousands of cells costs several Python objects per cell. ``CompactVDOM``
+keeps one entry per node in three parallel arrays of machine integers
+instead, in document order:
+
+- ``tags``: the id of the element's tag in ``names``, or ``TEXT`` or
+  ``OBJECT`` for the other kinds of nodes.
+- ``parents``: the index of the parent node, ``-1`` at the top level.
+- ``values``: for elements the id of their props in ``props``, for text
+  the id of the string in ``texts`` and otherwise of the object in
+  ``objects``.
+
+Tag names and props are interned tables, so the many rows of a table
+that share their attributes share one entry. Components and other
+values without a compact form are kept as objects and rendered as usual.
+
+``render`` and ``render_gen`` serialize a ``CompactVDOM`` directly,
+through its ``__html__`` method, and it can be a child of a ``VDOMNode``.
+"""
+from __future__ import annotations
+
+from array import array
+from collections.abc import ByteString, Iterable
+from typing import Any, Hashable, Iterator, Mapping, Sequence, cast
+
+from .cache import TemplateCache, tag_cache, template_cache
+from .tagged import Tagged, tag
+from .viewdom import (
+    VDOM,
+    VDOMNode,
+    encode_props,
+    escape,
+    htm_eval,
+    htm_mark_static,
+    htm_parse,
+    join_parts,
+    raw_text,
+    render_gen,
+    tag_strings,
+)
+
+TEXT = -1
+OBJECT = -2
+
+
+class CompactVDOM:
+    """An immutable-by-convention VDOM in parallel arrays, see the module."""
+
+    __slots__ = (
+        "tags", "parents", "values", "names", "props", "texts", "objects",
+        "_name_ids", "_props_ids", "_encoded",
+    )
+
+    def __init__(self) -> None:
+        self.tags = array("i")
+        self.parents = array("i")
+        self.values = array("i")
+        self.names: list[str] = []
+        self.props: list[Mapping[str, object]] = [{}]
+        self.texts: list[str] = []
+        self.objects: list[object] = []
+        self._name_ids: dict[str, int] = {}
+        self._props_ids: dict[Hashable, int] = {(): 0}
+        self._encoded: dict[int, str] = {}
+
+    def __len__(self) -> int:
+        return len(self.tags)
+
+    @classmethod
+    def from_vdom(cls, value: VDOM | Any) -> CompactVDOM:
+        tree = cls()
+        tree.append(value, -1)
+        return tree
+
+    def add_element(self, this_tag: str, props: Mapping[str, object], parent: int) -> int:
+        """Append an element, returning its index to use as a parent."""
+        name_id = self._name_ids.get(this_tag)
+        if name_id is None:
+            name_id = self._name_ids[this_tag] = len(self.names)
+            self.names.append(this_tag)
+        return self._add(name_id, parent, self._intern_props(props))
+
+    def add_text(self, text: str, parent: int) -> int:
+        # Texts aren't interned: most are unique, and the static ones from
+        # a template are the same string object anyway.
+        self.texts.append(text)
+        return self._add(TEXT, parent, len(self.texts) - 1)
+
+    def add_object(self, value: object, parent: int) -> int:
+        self.objects.append(value)
+        return self._add(OBJECT, parent, len(self.objects) - 1)
+
+    def _add(self, this_tag: int, parent: int, value: int) -> int:
+        self.tags.append(this_tag)
+        self.parents.append(parent)
+        self.values.append(value)
+        return len(self.tags) - 1
+
+    def _intern_props(self, props: Mapping[str, object]) -> int:
+        try:
+            # Keyed with the types, so that Markup and str stay apart.
+            key: Hashable = tuple((name, type(value), value) for (name, value) in props.items())
+            props_id = self._props_ids.get(key)
+        except TypeError:
+            # Unhashable values, e.g. a list of classes, aren't shared.
+            key, props_id = None, None
+        if props_id is None:
+            props_id = len(self.props)
+            self.props.append(props)
+            if key is not None:
+                self._props_ids[key] = props_id
+        return props_id
+
+    def append(self, value: VDOM | Any, parent: int) -> None:
+        """Append a VDOM value under ``parent``, converting its nodes."""
+        stack: list[tuple[Any, int]] = [(value, parent)]
+        while stack:
+            item, parent = stack.pop()
+            if isinstance(item, str):
+                self.add_text(item, parent)
+            elif isinstance(item, VDOMNode) and isinstance(item.tag, str):
+                index = self.add_element(item.tag, item.props, parent)
+                stack.extend((child, index) for child in reversed(item.children))
+            elif isinstance(item, Iterable) and not isinstance(item, (ByteString, VDOMNode)):
+                stack.extend((child, parent) for child in reversed(list(item)))
+            else:
+                self.add_object(item, parent)
+
+    def to_vdom(self) -> VDOM | list[Any]:
+        """Build the equivalent ``VDOMNode`` tree, like ``htm_eval`` would."""
+        root: list[Any] = []
+        children: list[list[Any]] = []
+        for index in range(len(self.tags)):
+            this_tag, parent, value = self.tags[index], self.parents[index], self.values[index]
+            siblings = root if parent < 0 else children[parent]
+            if this_tag == TEXT:
+                item: Any = self.texts[value]
+            elif this_tag == OBJECT:
+                item = self.objects[value]
+            else:
+                item = VDOMNode(self.names[this_tag], self.props[value], [])
+                siblings.append(item)
+                children.append(item.children)
+                continue
+            siblings.append(item)
+            children.append([])
+        if len(root) == 1:
+            return cast(VDOM, root[0])
+        return root
+
+    def render_gen(self) -> Iterator[str]:
+        """Render as a generator, like ``render_gen`` does for nodes."""
+        tags, parents, values = self.tags, self.parents, self.values
+        names, props, texts, objects = self.names, self.props, self.texts, self.objects
+        encoded = self._encoded
+        # The open elements, as (index, closing markup, if its text is raw).
+        open_elements: list[tuple[int, str, bool]] = []
+        count = len(tags)
+        for index in range(count):
+            parent = parents[index]
+            while open_elements and open_elements[-1][0] != parent:
+                yield open_elements.pop()[1]
+
+            this_tag, value = tags[index], values[index]
+            if this_tag == TEXT:
+                if parent >= 0 and open_elements[-1][2]:
+                    yield escape(raw_text(texts[value]))
+                else:
+                    yield escape(texts[value])
+            elif this_tag == OBJECT:
+                yield from render_gen(objects[value])  # type: ignore
+            else:
+                opening, closing, empty, raw = tag_strings(names[this_tag])
+                yield opening
+                if value:
+                    attributes = encoded.get(value)
+                    if attributes is None:
+                        attributes = encoded[value] = encode_props(props[value])
+                    yield attributes
+                if index + 1 < count and parents[index + 1] == index:
+                    yield ">"
+                    open_elements.append((index, closing, raw))
+                else:
+                    yield empty
+        while open_elements:
+            yield open_elements.pop()[1]
+
+    def __html__(self) -> str:
+        return "".join(self.render_gen())
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, CompactVDOM):
+            return NotImplemented
+        return self.to_vdom() == other.to_vdom()
+
+    __hash__ = None  # type: ignore
+
+
+def htm_eval_compact(ops: list[Any], values: Sequence[Any]) -> CompactVDOM:
+    """Evaluate parsed template ops, like ``htm_eval``, into a ``CompactVDOM``."""
+    tree = CompactVDOM()
+    # The open elements, as [tag, props, index]: an element is only added
+    # once its props are complete, at its first child or when it closes.
+    stack: list[list[Any]] = [["", {}, -1]]
+
+    def parent() -> int:
+        this_tag, props, index = top = stack[-1]
+        if index is None:
+            index = top[2] = tree.add_element(this_tag, props, stack[-2][2])
+        return cast(int, index)
+
+    index = 0
+    while index < len(ops):
+        op = ops[index]
+        index += 1
+        if op[0] == "OPEN":
+            _, value, this_tag = op
+            if value and not isinstance(values[this_tag], str):
+                # A component has no compact form: keep its node, with
+                # its children, as is.
+                end, depth = index, 1
+                while depth:
+                    if ops[end][0] == "OPEN":
+                        depth += 1
+                    elif ops[end][0] == "CLOSE":
+                        depth -= 1
+                    end += 1
+                node = htm_eval(VDOMNode, ops[index - 1:end], values)
+                tree.add_object(node, parent())
+                index = end
+                continue
+            parent()
+            stack.append([values[this_tag] if value else this_tag, {}, None])
+        elif op[0] == "CLOSE":
+            parent()
+            stack.pop()
+        elif op[0] == "SPREAD":
+            _, value, item = op
+            stack[-1][1].update(values[item] if value else item)
+        elif op[0] == "PROP_SINGLE":
+            _, attr, value, item = op
+            stack[-1][1][attr] = values[item] if value else item
+        elif op[0] == "PROP_MULTI":
+            _, attr, items = op
+            stack[-1][1][attr] = join_parts(items, values)
+        elif op[0] == "CHILD":
+            _, value, item = op
+            tree.append(values[item] if value else item, parent())
+        else:
+            raise ValueError("unknown op")
+    return tree
+
+
+@template_cache("compact")
+def compact_prepare(strings: tuple[str, ...]) -> list[Any]:
+    """Parse template strings for ``htm_compact``."""
+    return htm_mark_static(htm_parse(strings))
+
+
+def htm_compact(cache: TemplateCache[tuple[str, ...], list[Any]] | None = None) -> Tagged[CompactVDOM]:
+    """Like ``htm``, but build a ``CompactVDOM``."""
+    cached_parse = tag_cache(compact_prepare, cache, None)
+
+    @tag
+    def __htm(strings: tuple[str, ...], values: tuple[Any, ...]) -> CompactVDOM:
+        return htm_eval_compact(cached_parse(strings), values)
+
+    return __htm
+
+
+compact_html = htm_compact()
+
+
+__all__ = [
+    "CompactVDOM",
+    "htm_eval_compact",
+    "htm_compact",
+    "compact_html",
+]
@@ -1,9 +1,12 @@
-from typing import Callable, Protocol, Type, TypeVar
+import time
+from typing import Callable, Hashable, Mapping, Protocol, Type, TypeVar, cast
 
 from antidote import implements, interface, world, inject
 
-from antidom.resource import Resource
-from antidom.viewdom import VDOM
+from antidom.cache import BoundedCache, register_cache
+from antidom.registry import ImplementationCache, register_per_request
+from antidom.resource import Resource, resource_version
+from antidom.viewdom import VDOM, Markup, render
 
 
 @interface
@@ -15,18 +18,86 @@ class Component(Protocol):
 
 C = TypeVar('C', bound=Type[Component])
 
+components = ImplementationCache(Component)
 
-def component(context: Type[Resource] | None = None) -> Callable[[C], C]:
+
+class Memoize(BoundedCache[Hashable, tuple[object, VDOM]]):
+    """Cache what a component renders, keyed by its props and resource.
+
+    The resource is identified by the object itself and its ``etag``, if it
+    exposes one, so a changed resource renders afresh.
+
+    Entries are evicted least recently used beyond ``maxsize`` and expire
+    after ``ttl`` seconds, if given. With ``as_string`` the rendered HTML is
+    kept instead of the VDOM. Only use this for components whose output
+    depends on nothing else, and whose props are hashable; calls with
+    unhashable props are rendered without caching.
+
+    ``component`` registers it for ``cache_stats``, named after the
+    component unless given a ``name``.
+    """
+
+    def __init__(
+            self,
+            maxsize: int = 128,
+            ttl: float | None = None,
+            as_string: bool = False,
+            clock: Callable[[], float] = time.monotonic,
+            name: str = "",
+    ) -> None:
+        super().__init__(name, maxsize=maxsize, ttl=ttl, clock=clock)
+        self.as_string = as_string
+
+    def __call__(self, props: Mapping[str, object], render_vdom: Callable[[], VDOM]) -> VDOM:
+        key, resource, cached = self.lookup(props)
+        if cached is not None:
+            return cached
+        value = render_vdom()
+        if key is None:
+            return value
+        return self.store(key, resource, value)
+
+    def lookup(self, props: Mapping[str, object]) -> tuple[Hashable | None, object, VDOM | None]:
+        """Find ``(key, resource, cached value)``, the key is None if uncacheable."""
+        resource = world.get(Resource)  # type: ignore
+        try:
+            # Entries hold their resource, so its id can't be reused meanwhile.
+            key = (id(resource), resource_version(resource), tuple(sorted(props.items())))
+            hash(key)
+        except TypeError:
+            return None, resource, None
+
+        entry = self.get(key)
+        return key, resource, None if entry is None else entry[1]
+
+    def store(self, key: Hashable, resource: object, value: VDOM) -> VDOM:
+        """Keep a freshly rendered value, returning what was stored."""
+        if self.as_string:
+            value = cast(VDOM, Markup(render(value)))
+        self.put(key, (resource, value))
+        return value
+
+
+def component(
+        context: Type[Resource] | None = None,
+        memoize: bool | Memoize = False,
+) -> Callable[[C], C]:
     def decorate(cls: C) -> C:
+        register_per_request(cls)
         implements(Component).when(qualified_by=context)(cls)
+        components.clear()
+        if memoize:
+            memo = memoize if isinstance(memoize, Memoize) else Memoize()
+            memo.name = memo.name or f"memoize:{cls.__module__}.{cls.__qualname__}"
+            register_cache(memo)
+            cls.__memoize__ = memo  # type: ignore
         return cls
 
     return decorate
 
 
+@inject
 def get_component(this_resource: Resource = inject.me()) -> Component:
     """Find the correct component for the context."""
-    context_type = this_resource.__class__
-    components = world.get[Component]  # type: ignore
-    this_component = components.single(qualified_by=context_type)
+    this_component: Component = components.get(this_resource.__class__)
     return this_component
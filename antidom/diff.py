@@ -0,0 +1,282 @@
+"""Compare two renders of a VDOM and list the changes between them.
+
+A browser holding the old page can apply the patches instead of
+receiving it again in full. Nodes are addressed by their path, the
+indexes of the children to follow from the top-level nodes down.
+Patches are tuples starting with a one letter operation:
+
+- ``(REPLACE, path, node)`` replaces the node at ``path``.
+- ``(TEXT, path, html)`` replaces the text at ``path``.
+- ``(PROPS, path, changed, removed)`` sets and removes attributes.
+- ``(INSERT, path, node)`` inserts a node, so that it ends up at ``path``.
+- ``(REMOVE, path)`` removes the node at ``path``.
+- ``(MOVE, path, index)`` moves the node at ``path`` to ``index`` among
+  its siblings.
+
+Patches apply in order, each to the result of those before it. Children
+with a ``key`` prop are matched by key, so reordering them gives moves.
+Frozen nodes that are the same object in both renders, such as the
+static parts of templates, are skipped without looking inside.
+"""
+from __future__ import annotations
+
+import html as html_lib
+import json
+from functools import partial
+from collections.abc import ByteString, Iterable
+from typing import Any, Callable, Hashable, Sequence
+
+from .viewdom import VDOM, Markup, VDOMNode, escape, raw_text, relaxed_call, render, tag_strings
+
+REPLACE = "r"
+TEXT = "t"
+PROPS = "p"
+INSERT = "i"
+REMOVE = "d"
+MOVE = "m"
+
+Path = tuple[int, ...]
+Patch = tuple[Any, ...]
+Child = VDOMNode | str
+
+
+def expand(value: VDOM | Any) -> list[Child]:
+    """Render components away, leaving a list of plain nodes and strings.
+
+    Adjacent strings are merged, as they make one text node in the page.
+    Nodes whose children need no change are kept as they are.
+    """
+    children: list[Child] = []
+    stack: list[Any] = [value]
+    while stack:
+        item = stack.pop()
+        if isinstance(item, VDOMNode):
+            if callable(item.tag):
+                stack.append(relaxed_call(item.tag, props=item.props))
+                continue
+            old_children: list[Any] = item.children
+            if tag_strings(item.tag)[3]:
+                old_children = [raw_text(child) for child in old_children]
+            new_children = expand(old_children)
+            unchanged = len(new_children) == len(item.children) and all(
+                new is old for (new, old) in zip(new_children, old_children)
+            )
+            if not unchanged:
+                item = VDOMNode(item.tag, item.props, new_children)
+            children.append(item)
+        elif isinstance(item, str):
+            if not item:
+                continue
+            if children and isinstance(children[-1], str):
+                item = Markup(escape(children.pop()) + escape(item))
+            children.append(item)
+        elif hasattr(item, '__html__'):
+            # Already rendered, e.g. a CompactVDOM, so compared as markup.
+            stack.append(Markup(item.__html__()))
+        elif isinstance(item, Iterable) and not isinstance(item, ByteString):
+            stack.extend(reversed(list(item)))
+        elif hasattr(item, '__vdom__'):
+            vdom = item.__vdom__()
+            if vdom not in (True, False, None):
+                stack.append(vdom)
+        else:
+            raise ValueError("Unknown flattened value")
+    return children
+
+
+def attribute_value(value: object) -> str | bool | None:
+    """The value an attribute takes in the page, ``None`` if it is omitted."""
+    if value is True:
+        return True
+    if value is False or value is None:
+        return None
+    if hasattr(value, "__html__"):
+        return html_lib.unescape(value.__html__())
+    if isinstance(value, (list, tuple)):
+        return " ".join(str(item) for item in value if item is not None and item is not False)
+    if isinstance(value, dict):
+        return "; ".join(
+            f"{name}: {item}" for (name, item) in value.items()
+            if item is not None and item is not False
+        )
+    return str(value)
+
+
+def key_of(child: Child) -> Hashable | None:
+    return child.props.get("key") if isinstance(child, VDOMNode) else None
+
+
+def diff(old: VDOM | Any, new: VDOM | Any) -> list[Patch]:
+    """The patches turning the render of ``old`` into that of ``new``."""
+    patches: list[Patch] = []
+    diff_children(expand(old), expand(new), (), patches)
+    return patches
+
+
+def diff_node(old: Child, new: Child, path: Path, patches: list[Patch]) -> None:
+    if old is new:
+        return
+    if isinstance(old, str) and isinstance(new, str):
+        text = escape(new)
+        if escape(old) != text:
+            patches.append((TEXT, path, text))
+    elif (
+            isinstance(old, VDOMNode) and isinstance(new, VDOMNode)
+            and old.tag == new.tag and key_of(old) == key_of(new)
+    ):
+        diff_props(old.props, new.props, path, patches)
+        diff_children(old.children, new.children, path, patches)
+    else:
+        patches.append((REPLACE, path, new))
+
+
+def diff_props(
+        old: Any,
+        new: Any,
+        path: Path,
+        patches: list[Patch],
+) -> None:
+    if old is new or old == new:
+        return
+    old_values = {name: attribute_value(value) for (name, value) in old.items()}
+    new_values = {name: attribute_value(value) for (name, value) in new.items()}
+    changed = {
+        name: value for (name, value) in new_values.items()
+        if value is not None and old_values.get(name) != value
+    }
+    removed = tuple(
+        name for (name, value) in old_values.items()
+        if value is not None and new_values.get(name) is None
+    )
+    if changed or removed:
+        patches.append((PROPS, path, changed, removed))
+
+
+def diff_children(
+        old: Sequence[Child],
+        new: Sequence[Child],
+        path: Path,
+        patches: list[Patch],
+) -> None:
+    old_keys = [key_of(child) for child in old]
+    new_keys = [key_of(child) for child in new]
+    keyed = [key for key in old_keys if key is not None]
+    new_keyed = [key for key in new_keys if key is not None]
+    unique = len(set(keyed)) == len(keyed) and len(set(new_keyed)) == len(new_keyed)
+    if not (keyed or new_keyed) or not unique:
+        # Without keys, or with duplicate ones, match children by position.
+        for index, (old_child, new_child) in enumerate(zip(old, new)):
+            diff_node(old_child, new_child, path + (index,), patches)
+        for index in range(len(old), len(new)):
+            patches.append((INSERT, path + (index,), new[index]))
+        for index in reversed(range(len(new), len(old))):
+            patches.append((REMOVE, path + (index,)))
+        return
+
+    # The children as they are after the patches so far.
+    current = list(old)
+    kept = set(new_keyed)
+    for index in reversed(range(len(current))):
+        key = old_keys[index]
+        if key is not None and key not in kept:
+            patches.append((REMOVE, path + (index,)))
+            del current[index]
+
+    for index, (new_child, key) in enumerate(zip(new, new_keys)):
+        if key is not None:
+            found = next(
+                (at for at in range(index, len(current)) if key_of(current[at]) == key),
+                None,
+            )
+            if found is not None:
+                if found != index:
+                    patches.append((MOVE, path + (found,), index))
+                    current.insert(index, current.pop(found))
+                diff_node(current[index], new_child, path + (index,), patches)
+                continue
+        elif index < len(current) and key_of(current[index]) is None:
+            diff_node(current[index], new_child, path + (index,), patches)
+            continue
+        patches.append((INSERT, path + (index,), new_child))
+        current.insert(index, new_child)
+
+    for index in reversed(range(len(new), len(current))):
+        patches.append((REMOVE, path + (index,)))
+
+
+def apply_patches(value: VDOM | Any, patches: Iterable[Patch]) -> list[Child]:
+    """Apply patches to a VDOM, e.g. to check them without a browser."""
+    children = expand(value)
+    for patch in patches:
+        children = update(children, patch[1], partial(apply, patch))
+    return children
+
+
+def apply(patch: Patch, siblings: list[Child], index: int) -> None:
+    """Apply a patch to the node at ``index`` of a mutable list of siblings."""
+    operation = patch[0]
+    if operation == REPLACE:
+        siblings[index] = patch[2]
+    elif operation == TEXT:
+        siblings[index] = Markup(patch[2])
+    elif operation == PROPS:
+        node = siblings[index]
+        assert isinstance(node, VDOMNode)
+        props = {
+            name: value for (name, value) in node.props.items() if name not in patch[3]
+        }
+        props.update(patch[2])
+        siblings[index] = VDOMNode(node.tag, props, node.children)
+    elif operation == INSERT:
+        siblings.insert(index, patch[2])
+    elif operation == REMOVE:
+        del siblings[index]
+    elif operation == MOVE:
+        siblings.insert(patch[2], siblings.pop(index))
+    else:
+        raise ValueError(f"unknown patch operation {operation!r}")
+
+
+def update(
+        children: list[Child],
+        path: Path,
+        change: Callable[[list[Child], int], None],
+) -> list[Child]:
+    """Copy the nodes along ``path``, changing the siblings at its end."""
+    children = list(children)
+    if len(path) == 1:
+        change(children, path[0])
+        return children
+    node = children[path[0]]
+    assert isinstance(node, VDOMNode)
+    children[path[0]] = VDOMNode(
+        node.tag, node.props, update(node.children, path[1:], change)
+    )
+    return children
+
+
+def dump_patches(patches: Iterable[Patch]) -> str:
+    """Serialize patches to compact JSON, with nodes rendered to HTML."""
+    return json.dumps(
+        [
+            [patch[0], patch[1], render(patch[2])] if patch[0] in (REPLACE, INSERT)
+            else list(patch)
+            for patch in patches
+        ],
+        separators=(",", ":"),
+        ensure_ascii=False,
+    )
+
+
+__all__ = [
+    "diff",
+    "dump_patches",
+    "apply_patches",
+    "expand",
+    "REPLACE",
+    "TEXT",
+    "PROPS",
+    "INSERT",
+    "REMOVE",
+    "MOVE",
+]
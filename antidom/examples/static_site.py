@@ -0,0 +1,65 @@
+"""Render a whole tree of resources to files.
+
+Each resource gets its own page, rendered by the view for its type. Run
+``python -m antidom.batch antidom.examples.static_site:site -o public``
+to write them all.
+"""
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, cast
+
+from antidote import inject
+
+from antidom import VDOM, Resource, html
+from antidom.batch import render_batch
+from antidom.view import view
+
+
+@dataclass
+class Folder:
+    name: str | None
+    parent: Resource | None
+
+
+@dataclass
+class Document:
+    name: str | None
+    parent: Resource | None
+    title: str = ''
+
+
+@view(context=Folder)
+@dataclass
+class FolderView:
+    folder: Resource = inject.me()
+
+    def __vdom__(self) -> VDOM:
+        name = self.folder.name or 'Home'
+        return html('<h1>{name}</h1>')
+
+
+@view(context=Document)
+@dataclass
+class DocumentView:
+    document: Resource = inject.me()
+
+    def __vdom__(self) -> VDOM:
+        title = cast(Document, self.document).title
+        return html('<article><h1>{title}</h1></article>')
+
+
+def site(size: int = 3) -> Iterator[Resource]:
+    root = Folder(name=None, parent=None)
+    yield root
+    for i in range(size):
+        folder = Folder(name=f'f{i}', parent=root)
+        yield folder
+        yield Document(name='about', parent=folder, title=f'About {i}')
+
+
+def main() -> tuple[str, str]:
+    with tempfile.TemporaryDirectory() as output:
+        render_batch(site(), output, processes=0)
+        actual = (Path(output) / 'f1' / 'about' / 'index.html').read_text()
+    return actual, '<article><h1>About 1</h1></article>'
@@ -0,0 +1,74 @@
+"""Cache the rendered HTML of views and components per resource.
+
+A resource is identified by the object itself plus the ``etag`` it may
+expose. When the etag changes the fragment is rendered again; resources
+without one stay cached until invalidated or evicted.
+"""
+from __future__ import annotations
+
+from typing import Callable, Hashable
+
+from .cache import BoundedCache, register_cache
+from .component import get_component
+from .resource import Resource, resource_context, resource_version
+from .view import get_view
+from .viewdom import render
+
+
+class FragmentCache(BoundedCache[tuple[Hashable, int], tuple[object, object, str]]):
+    """Rendered HTML by (kind, resource), bounded by total characters.
+
+    Entries are ``(resource, etag, html)``. They keep their resource
+    alive, so its id, in the key, can't be reused by another meanwhile.
+    """
+
+    def __init__(self, max_size: int = 16 * 1024 * 1024, name: str = "fragments") -> None:
+        super().__init__(name, maxsize=max_size, weigh=lambda entry: len(entry[2]))
+
+    def render(self, kind: Hashable, resource: Resource, render_html: Callable[[], str]) -> str:
+        """Return the cached HTML for a resource, or render and keep it."""
+        key = (kind, id(resource))
+        version = resource_version(resource)
+        entry = self.get(key, valid=lambda entry: entry[1] == version)
+        if entry is not None:
+            return entry[2]
+        html = render_html()
+        self.put(key, (resource, version, html))
+        return html
+
+    def invalidate(self, resource: Resource) -> None:
+        """Forget every fragment rendered for this resource."""
+        self.discard(lambda key, entry: key[1] == id(resource))
+
+    def invalidate_type(self, resource_type: type) -> None:
+        """Forget every fragment rendered for resources of this type."""
+        self.discard(lambda key, entry: isinstance(entry[0], resource_type))
+
+
+fragments = FragmentCache()
+register_cache(fragments)
+
+
+def render_view(resource: Resource, cache: FragmentCache | None = None) -> str:
+    """Render the view of a resource, reusing its HTML while unchanged."""
+    cache = fragments if cache is None else cache
+
+    def render_html() -> str:
+        with resource_context(resource):
+            return render(get_view().__vdom__())
+
+    return cache.render("view", resource, render_html)
+
+
+def render_component(resource: Resource, cache: FragmentCache | None = None) -> str:
+    """Render the component for a resource, reusing its HTML while unchanged."""
+    cache = fragments if cache is None else cache
+
+    def render_html() -> str:
+        with resource_context(resource):
+            return render(get_component().__vdom__())
+
+    return cache.render("component", resource, render_html)
+
+
+__all__ = ["FragmentCache", "fragments", "render_view", "render_component"]
@@ -0,0 +1,218 @@
+"""Parsed templates as integer instructions instead of tuples of strings.
+
+``htm_parse`` gives a list of tuples like ``("PROP_SINGLE", "class",
+False, "box")``. ``assemble`` packs them into a ``Program``: an array of
+``(opcode, a, b)`` integer triples, of the smallest integer type that
+fits, and a table of the constants they refer to, such as tag names and
+static text, each stored once. ``evaluate`` runs a program like
+``htm_eval`` runs ops, dispatching on small integers.
+
+Programs of ops straight from ``htm_parse`` only hold strings, numbers,
+booleans and tuples, so ``dumps`` can write them to disk with ``marshal``.
+
+A program is a fraction of the size of its ops, but ``evaluate`` is no
+faster than ``htm_eval``: building the nodes dominates. ``htm`` caches
+generated functions rather than programs, so programs only save memory
+where they are kept: the fallback for templates too deep to compile, the
+subtrees ``htm_render`` builds at call time and the precompiled cache.
+"""
+from __future__ import annotations
+
+import marshal
+import sys
+from array import array
+from typing import Any, Callable, Hashable, Sequence
+
+# The operand ``a`` and ``b`` of each instruction are indexes into the
+# constants, unless noted as a value index into the interpolated values.
+CHILD = 0  # a: the child
+CHILD_VALUE = 1  # a: value index of the child
+PROP = 2  # a: the name, b: the value
+PROP_VALUE = 3  # a: the name, b: value index of the value
+PROP_MULTI = 4  # a: the name, b: (is_text, text or value index) parts
+OPEN = 5  # a: the tag
+OPEN_VALUE = 6  # a: value index of the tag
+CLOSE = 7
+SPREAD = 8  # a: the props
+SPREAD_VALUE = 9  # a: value index of the props
+
+# Bump when the layout written by ``Program.dumps`` changes.
+FORMAT_VERSION = 1
+
+
+class Program:
+    """Instructions and the constants they use, see the module."""
+
+    __slots__ = ("code", "constants")
+
+    def __init__(self, code: array[int], constants: tuple[Any, ...]) -> None:
+        self.code = code
+        self.constants = constants
+
+    def __len__(self) -> int:
+        return len(self.code) // 3
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, Program):
+            return NotImplemented
+        return self.code == other.code and self.constants == other.constants
+
+    __hash__ = None  # type: ignore
+
+    def ops(self) -> list[Any]:
+        """The ops this program was assembled from."""
+        constants = self.constants
+        ops: list[Any] = []
+        it = iter(self.code)
+        for op, a, b in zip(it, it, it):
+            if op == CHILD:
+                ops.append(("CHILD", False, constants[a]))
+            elif op == CHILD_VALUE:
+                ops.append(("CHILD", True, a))
+            elif op == PROP:
+                ops.append(("PROP_SINGLE", constants[a], False, constants[b]))
+            elif op == PROP_VALUE:
+                ops.append(("PROP_SINGLE", constants[a], True, b))
+            elif op == PROP_MULTI:
+                ops.append(("PROP_MULTI", constants[a], constants[b]))
+            elif op == OPEN:
+                ops.append(("OPEN", False, constants[a]))
+            elif op == OPEN_VALUE:
+                ops.append(("OPEN", True, a))
+            elif op == CLOSE:
+                ops.append(("CLOSE",))
+            elif op == SPREAD:
+                ops.append(("SPREAD", False, constants[a]))
+            elif op == SPREAD_VALUE:
+                ops.append(("SPREAD", True, a))
+            else:
+                raise ValueError("unknown opcode")
+        return ops
+
+    def dumps(self) -> bytes:
+        """Serialize with ``marshal``, for programs of plain constants."""
+        return marshal.dumps((
+            FORMAT_VERSION, sys.byteorder, self.code.typecode, self.code.tobytes(), self.constants,
+        ))
+
+    @classmethod
+    def loads(cls, data: bytes) -> Program:
+        version, byteorder, typecode, code_bytes, constants = marshal.loads(data)
+        if version != FORMAT_VERSION:
+            raise ValueError(f"unsupported program format {version}")
+        code = array(typecode)
+        code.frombytes(code_bytes)
+        if byteorder != sys.byteorder:
+            code.byteswap()
+        return cls(code, constants)
+
+
+def assemble(ops: Sequence[Any]) -> Program:
+    """Pack ops into a ``Program``."""
+    code: list[int] = []
+    constants: list[Any] = []
+    index: dict[Hashable, int] = {}
+
+    def const(item: object) -> int:
+        try:
+            # Keyed with the type, so that True, 1 and "1" stay apart.
+            key: Hashable = (type(item), item)
+            found = index.get(key)
+        except TypeError:
+            key, found = None, None
+        if found is None:
+            found = len(constants)
+            constants.append(item)
+            if key is not None:
+                index[key] = found
+        return found
+
+    for op in ops:
+        kind = op[0]
+        if kind == "CHILD":
+            _, value, item = op
+            code.extend((CHILD_VALUE, item, 0) if value else (CHILD, const(item), 0))
+        elif kind == "PROP_SINGLE":
+            _, attr, value, item = op
+            code.extend((PROP_VALUE, const(attr), item) if value else (PROP, const(attr), const(item)))
+        elif kind == "PROP_MULTI":
+            _, attr, items = op
+            code.extend((PROP_MULTI, const(attr), const(tuple(items))))
+        elif kind == "OPEN":
+            _, value, this_tag = op
+            code.extend((OPEN_VALUE, this_tag, 0) if value else (OPEN, const(this_tag), 0))
+        elif kind == "CLOSE":
+            code.extend((CLOSE, 0, 0))
+        elif kind == "SPREAD":
+            _, value, item = op
+            code.extend((SPREAD_VALUE, item, 0) if value else (SPREAD, const(item), 0))
+        else:
+            raise ValueError("unknown op")
+
+    largest = max(code, default=0)
+    typecode = "B" if largest < 1 << 8 else "H" if largest < 1 << 16 else "i"
+    return Program(array(typecode, code), tuple(constants))
+
+
+def join_text(items: Sequence[tuple[bool, Any]], values: Sequence[Any]) -> str:
+    """Join the text and value parts of a ``PROP_MULTI``."""
+    return "".join(item if is_text else str(values[item]) for (is_text, item) in items)
+
+
+def evaluate(
+        h: Callable[..., object],
+        program: Program,
+        values: Sequence[Any],
+        join: Callable[[Sequence[tuple[bool, Any]], Sequence[Any]], object] = join_text,
+) -> Any:
+    """Build what a program describes, like ``htm_eval`` does for ops.
+
+    ``join`` builds the value of attributes mixing text and values, e.g.
+    escaping the values as ``viewdom.join_parts`` does.
+    """
+    constants = program.constants
+    root: list[Any] = []
+    # The element being built is kept in locals, its ancestors on a stack.
+    this_tag: Any = ""
+    props: dict[str, Any] = {}
+    children = root
+    stack: list[tuple[Any, dict[str, Any], list[Any]]] = []
+
+    it = iter(program.code)
+    # Opcodes are compared with integer literals, as global lookups would
+    # cost more than the comparisons themselves. The most frequent come
+    # first.
+    for op, a, b in zip(it, it, it):
+        if op == 0:  # CHILD
+            children.append(constants[a])
+        elif op == 1:  # CHILD_VALUE
+            children.append(values[a])
+        elif op == 2:  # PROP
+            props[constants[a]] = constants[b]
+        elif op == 5:  # OPEN
+            stack.append((this_tag, props, children))
+            this_tag, props, children = constants[a], {}, []
+        elif op == 7:  # CLOSE
+            node = h(this_tag, props, children)
+            this_tag, props, children = stack.pop()
+            children.append(node)
+        elif op == 3:  # PROP_VALUE
+            props[constants[a]] = values[b]
+        elif op == 4:  # PROP_MULTI
+            props[constants[a]] = join(constants[b], values)
+        elif op == 6:  # OPEN_VALUE
+            stack.append((this_tag, props, children))
+            this_tag, props, children = values[a], {}, []
+        elif op == 8:  # SPREAD
+            props.update(constants[a])
+        elif op == 9:  # SPREAD_VALUE
+            props.update(values[a])
+        else:
+            raise ValueError("unknown opcode")
+
+    if len(root) == 1:
+        return root[0]
+    return root
+
+
+__all__ = ["Program", "assemble", "evaluate"]
@@ -0,0 +1,99 @@
+"""Render independent regions of a page on a thread pool.
+
+Mirrors ``render`` and ``render_gen`` from ``antidom.viewdom``. Where a
+node has several components among its children, e.g. the regions under a
+layout, each of them is rendered on a worker thread while the markup
+around them is produced in order. Each worker runs in a copy of the
+caller's context, so it sees the resource of the current request.
+"""
+from __future__ import annotations
+
+import contextvars
+from collections.abc import ByteString, Iterable
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Iterator, Sequence
+
+from .viewdom import VDOM, VDOMNode, render, render_gen
+
+
+def is_region(item: object) -> bool:
+    """Whether an item renders through a component."""
+    if isinstance(item, VDOMNode):
+        return callable(item.tag)
+    return not isinstance(item, (str, ByteString, Iterable)) and hasattr(item, '__vdom__')
+
+
+def submit_region(executor: Executor, item: object) -> Future[str]:
+    """Render an item on the executor, in a copy of the current context."""
+    # A context can only be entered by one thread at a time, so each
+    # region gets its own copy.
+    context = contextvars.copy_context()
+    return executor.submit(context.run, render, item)  # type: ignore
+
+
+class Region:
+    """A component rendered elsewhere, in its place among its siblings."""
+
+    __slots__ = ("future",)
+
+    def __init__(self, future: Future[str]) -> None:
+        self.future = future
+
+    def __html__(self) -> str:
+        return self.future.result()
+
+
+def submit_regions(
+        items: Sequence[Any],
+        submit: Callable[[object], Future[str]],
+) -> Sequence[Any]:
+    """Submit the components among siblings, if there is more than one.
+
+    A lone component is left to be expanded in place instead, so the
+    siblings inside a layout component are still found.
+    """
+    if sum(1 for item in items if is_region(item)) < 2:
+        return items
+    return [Region(submit(item)) if is_region(item) else item for item in items]
+
+
+def render_gen_parallel(
+        value: VDOM | Any,
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+) -> Iterator[str]:
+    """Render as a generator, rendering sibling components concurrently.
+
+    Without an ``executor`` a thread pool of ``max_workers`` is created for
+    the duration of the render.
+    """
+    if executor is None:
+        with ThreadPoolExecutor(max_workers=max_workers) as owned:
+            yield from render_gen_parallel(value, owned)
+        return
+
+    pool = executor
+    futures: list[Future[str]] = []
+
+    def submit(item: object) -> Future[str]:
+        future = submit_region(pool, item)
+        futures.append(future)
+        return future
+
+    try:
+        yield from render_gen(value, lambda items: submit_regions(items, submit))
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def render_parallel(
+        value: VDOM | Any,
+        executor: Executor | None = None,
+        max_workers: int | None = None,
+) -> str:
+    """Render a VDOM to a string, rendering sibling components concurrently."""
+    return "".join(render_gen_parallel(value, executor, max_workers))
+
+
+__all__ = ["render_parallel", "render_gen_parallel"]
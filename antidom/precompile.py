@@ -0,0 +1,156 @@
+"""Precompile the templates of a package into an on-disk cache.
+
+Run ``python -m antidom.precompile mypackage -o templates.cache`` at build
+time, then point ``ANTIDOM_TEMPLATE_CACHE`` at the file so workers load it
+when ``antidom`` is imported, skipping tokenizing and parsing on first use.
+"""
+from __future__ import annotations
+
+import argparse
+import ast
+import importlib.util
+import marshal
+import os
+import sys
+import warnings
+from pathlib import Path
+from typing import Any, Iterator
+
+from .opcodes import Program, assemble
+from .tagged import compile_exprs, split, split_compiled
+from .viewdom import (
+    htm_compile_string,
+    htm_mark_static,
+    htm_parse,
+    htm_prepare,
+    htm_prepare_ops,
+    htm_render_prepare,
+)
+
+# Bump when the layout of the cache file changes.
+FORMAT_VERSION = 2
+MAGIC = "antidom-templates"
+
+# Names of the tagged template functions whose calls are precompiled.
+TAG_NAMES = ("html", "render_html")
+
+
+def find_templates(package: str) -> Iterator[tuple[str, str]]:
+    """Yield ``(tag_name, template)`` for literal templates in a package."""
+    spec = importlib.util.find_spec(package)
+    if spec is None:
+        raise ValueError(f"package {package!r} not found")
+    if spec.submodule_search_locations:
+        paths = sorted(
+            path
+            for location in spec.submodule_search_locations
+            for path in Path(location).rglob("*.py")
+        )
+    elif spec.origin:
+        paths = [Path(spec.origin)]
+    else:
+        paths = []
+
+    for path in paths:
+        tree = ast.parse(path.read_text(encoding="utf-8"), str(path))
+        for node in ast.walk(tree):
+            if not isinstance(node, ast.Call) or not node.args:
+                continue
+            func = node.func
+            name = func.id if isinstance(func, ast.Name) else getattr(func, "attr", None)
+            if name not in TAG_NAMES:
+                continue
+            template = literal_template(node.args[0])
+            if template is not None:
+                yield name, template
+
+
+def literal_template(node: ast.expr) -> str | None:
+    """The template string, if it is known without running the code."""
+    if isinstance(node, ast.Constant) and isinstance(node.value, str):
+        return node.value
+    if isinstance(node, ast.JoinedStr) and all(
+            isinstance(value, ast.Constant) for value in node.values
+    ):
+        return "".join(value.value for value in node.values)  # type: ignore
+    return None
+
+
+def precompile(templates: Iterator[tuple[str, str]]) -> list[tuple[Any, ...]]:
+    """Split and parse templates into marshal-friendly cache entries.
+
+    The parsed ops are stored as a serialized ``Program``, more compact
+    than the tuples themselves.
+    """
+    entries = []
+    seen = set()
+    for name, template in templates:
+        if (name, template) in seen:
+            continue
+        seen.add((name, template))
+        strings, exprs = split(template)
+        code = compile_exprs(exprs) if exprs else None
+        entries.append((name, template, strings, code, assemble(htm_parse(strings)).dumps()))
+    return entries
+
+
+def dump_cache(entries: list[tuple[Any, ...]], path: str | os.PathLike[str]) -> None:
+    header = (MAGIC, FORMAT_VERSION, sys.implementation.cache_tag)
+    Path(path).write_bytes(marshal.dumps((header, entries)))
+
+
+def load_cache(path: str | os.PathLike[str]) -> int:
+    """Fill the template caches from a file, returning the number loaded.
+
+    Bounded caches grow to fit the file, so no entry evicts another, but
+    only templates still cached at the end are counted, e.g. none with
+    caching disabled. Files written by another format or Python version
+    are skipped with a warning, as the code objects in them can't be
+    trusted.
+    """
+    try:
+        header, entries = marshal.loads(Path(path).read_bytes())
+    except (OSError, EOFError, ValueError, TypeError) as exc:
+        warnings.warn(f"cannot read template cache {path}: {exc}")
+        return 0
+    if header != (MAGIC, FORMAT_VERSION, sys.implementation.cache_tag):
+        warnings.warn(f"ignoring template cache {path} written for {header}")
+        return 0
+
+    split_compiled.reserve(len({entry[1] for entry in entries}))
+    htm_prepare.reserve(len({entry[2] for entry in entries if entry[0] == "html"}))
+    htm_render_prepare.reserve(len({entry[2] for entry in entries if entry[0] != "html"}))
+    for name, template, strings, code, program in entries:
+        split_compiled.put(template, (strings, code))
+        ops = Program.loads(program).ops()
+        # Only the generated render functions are rebuilt here.
+        if name == "html":
+            htm_prepare.put(strings, htm_prepare_ops(ops))
+        else:
+            htm_render_prepare.put(strings, htm_compile_string(htm_mark_static(ops)))
+    return sum(
+        template in split_compiled
+        and strings in (htm_prepare if name == "html" else htm_render_prepare)
+        for (name, template, strings, _, _) in entries
+    )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="antidom-precompile",
+        description="Precompile the html() templates of packages into a cache file.",
+    )
+    parser.add_argument("packages", nargs="+", help="importable package names to scan")
+    parser.add_argument("-o", "--output", default="antidom-templates.cache")
+    args = parser.parse_args(argv)
+
+    entries = []
+    for package in args.packages:
+        entries.extend(precompile(find_templates(package)))
+    dump_cache(entries, args.output)
+    print(f"wrote {len(entries)} templates to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
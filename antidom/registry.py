@@ -0,0 +1,68 @@
+"""Remember which implementation serves each resource type."""
+from __future__ import annotations
+
+import threading
+from typing import Any
+
+from antidote import injectable, world
+from antidote.core.exceptions import DependencyNotFoundError, DuplicateDependencyError
+
+
+def register_per_request(cls: type) -> None:
+    """Make Antidote build a fresh instance of ``cls`` on each lookup.
+
+    Views and components get the current resource injected when they are
+    instantiated, so they must not be singletons shared across requests.
+    Classes already declared ``injectable`` keep their own settings.
+    """
+    try:
+        injectable(cls, singleton=False)
+    except DuplicateDependencyError:
+        pass
+
+
+class ImplementationCache:
+    """Map resource classes to the class implementing an interface for them.
+
+    The first lookup for a resource class asks Antidote, trying each class
+    of its MRO so that subclasses fall back to their bases' implementation.
+    Later lookups are a dict access. Registering an implementation must
+    ``clear`` the cache, which the ``view`` and ``component`` decorators do.
+    """
+
+    def __init__(self, interface: type) -> None:
+        self.interface = interface
+        self._classes: dict[type, type] = {}
+        self._lock = threading.Lock()
+
+    def resolve(self, context_type: type) -> Any:
+        """Ask Antidote for the implementation instance, caching its class.
+
+        Antidote only finds an implementation by building it, so the
+        instance is returned for the caller to use rather than thrown away.
+        """
+        implementations = world.get[self.interface]  # type: ignore
+        error: DependencyNotFoundError | None = None
+        for cls in context_type.__mro__:
+            try:
+                instance = implementations.single(qualified_by=cls)
+            except DependencyNotFoundError as exc:
+                error = error or exc
+                continue
+            with self._lock:
+                self._classes[context_type] = type(instance)
+            return instance
+        assert error is not None
+        raise error
+
+    def get(self, context_type: type) -> Any:
+        """The implementation instance for a resource class."""
+        try:
+            implementation = self._classes[context_type]
+        except KeyError:
+            return self.resolve(context_type)
+        return world.get(implementation)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._classes.clear()
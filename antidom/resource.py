@@ -1,8 +1,10 @@
 """Define and fetch resources from a resource tree."""
 from __future__ import annotations
 
+from contextlib import contextmanager
+from contextvars import ContextVar
 from copy import copy
-from typing import Protocol
+from typing import Iterator, Protocol
 
 from antidote import world, inject, Provide
 from antidote.core import Provider, DependencyValue, Container
@@ -14,16 +16,29 @@ class Resource(Protocol):
     parent: Resource | None
 
 
+def resource_version(resource: object) -> object:
+    """The ``etag`` a resource may expose to tell when it changed, if any."""
+    return getattr(resource, "etag", None)
+
+
 @world.provider
 class ResourceProvider(Provider[str]):
-    _current_resource: Resource | None
+    """Provide the resource of the current request.
+
+    The resource is kept in a context variable, so concurrent requests in
+    threads or asyncio tasks each see their own.
+    """
+    _current_resource: ContextVar[Resource | None]
 
     def __init__(self, first_resource: Resource | None = None) -> None:
         super().__init__()
-        self._current_resource = first_resource
+        self._current_resource = ContextVar(
+            f"antidom_resource_{id(self)}", default=first_resource
+        )
 
     def clone(self, keep_singletons_cache: bool) -> ResourceProvider:
-        this_copy = None if self._current_resource is None else copy(self._current_resource)
+        current = self._current_resource.get()
+        this_copy = None if current is None else copy(current)
         return ResourceProvider(first_resource=this_copy)
 
     def exists(self, dependency: object) -> bool:
@@ -31,10 +46,18 @@ class ResourceProvider(Provider[str]):
 
     def provide(self, dependency: str, container: Container) -> DependencyValue:
         """Actually get the value."""
-        return DependencyValue(self._current_resource)
+        return DependencyValue(self._current_resource.get())
 
     def add_resource(self, resource: Resource) -> None:
-        self._current_resource = resource
+        self._current_resource.set(resource)
+
+    @contextmanager
+    def resource_context(self, resource: Resource) -> Iterator[Resource]:
+        token = self._current_resource.set(resource)
+        try:
+            yield resource
+        finally:
+            self._current_resource.reset(token)
 
 
 @inject
@@ -45,6 +68,21 @@ def add_resource(new_resource: Resource,
     provider.add_resource(new_resource)
 
 
+@contextmanager
+@inject
+def resource_context(new_resource: Resource,
+                     provider: Provide[ResourceProvider] | None = None,
+                     ) -> Iterator[Resource]:
+    """Make a resource current for the duration of a request.
+
+    The previous resource is restored on exit. Only the current thread or
+    asyncio task is affected.
+    """
+    assert provider is not None
+    with provider.resource_context(new_resource):
+        yield new_resource
+
+
 @inject
 def get_resource(this_resource: Resource = inject.me()) -> Resource:
     return this_resource
@@ -1,13 +1,33 @@
+import builtins
 import functools
-import inspect
 import io
 import re
+import sys
 from bisect import bisect
 from token import tok_name
 from tokenize import tokenize, untokenize, TokenInfo
-from typing import List, Callable
+from types import CodeType
+from typing import Any, List, Callable, Mapping, Protocol, TypeVar, overload
+
+from .cache import TemplateCache, tag_cache, template_cache
 
 RE_TEMPLATE = re.compile(rb"(?:{{|}}|[^{}])*(?={|$)")
+RE_TEMPLATE_STR = re.compile(r"(?:{{|}}|[^{}])*(?={|$)")
+
+# What scan_expr stops at: a complete single-line string literal, a brace,
+# or something only the tokenize based parser handles faithfully (line
+# breaks, comments, tabs, continuations, unterminated strings).
+RE_EXPR_STOP = re.compile(
+    r"'''(?:[^\\\n]|\\.)*?'''"
+    r'|"""(?:[^\\\n]|\\.)*?"""'
+    r"|'(?:[^'\\\n]|\\.)*'"
+    r'|"(?:[^"\\\n]|\\.)*"'
+    r"""|[{}\n\r\t\f#\\'"]"""
+)
+
+# Globals used when the caller passes an explicit namespace, so that
+# ``eval`` never has to insert ``__builtins__`` into the caller's mapping.
+NAMESPACE_GLOBALS: dict[str, Any] = {"__builtins__": builtins}
 
 
 class ParseError(ValueError):
@@ -15,6 +35,73 @@ class ParseError(ValueError):
 
 
 def split(string: str, compile_exprs: bool = False) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Split a template into its literal strings and expression sources.
+
+    Expressions are found by scanning the string directly. The rare ones
+    ``scan_expr`` can't handle are parsed with ``tokenize_expr`` instead.
+    """
+    strings = []
+    exprs: list[Any] = []
+    start = 0
+    while True:
+        match = RE_TEMPLATE_STR.match(string, start)
+        if not match:
+            raise ParseError("unbalanced closing braces")
+        strings.append(match.group(0).replace("{{", "{").replace("}}", "}"))
+        start = match.end()
+        if start == len(string):
+            break
+
+        end = scan_expr(string, start + 1)
+        if end is None:
+            expr, end = tokenize_expr(string, start + 1)
+        else:
+            # Like untokenize, keep leading but not trailing whitespace.
+            expr = string[start + 1:end].rstrip(" ")
+        exprs.append(expr if not compile_exprs else compile(expr, "", "eval"))
+        start = end + 1
+
+    return tuple(strings), tuple(exprs)
+
+
+def scan_expr(string: str, start: int) -> int | None:
+    """The index of the brace closing the expression starting at ``start``.
+
+    Returns ``None`` when the expression needs the tokenize based parser.
+    """
+    depth = 0
+    pos = start
+    while True:
+        match = RE_EXPR_STOP.search(string, pos)
+        if match is None:
+            return None
+        token = match.group(0)
+        if token == "{":
+            depth += 1
+        elif token == "}":
+            if depth == 0:
+                return match.start()
+            depth -= 1
+        elif len(token) == 1:
+            return None
+        pos = match.end()
+
+
+def tokenize_expr(string: str, start: int) -> tuple[str, int]:
+    """Parse the expression at ``start`` with ``tokenize``.
+
+    Returns its source and the index of its closing brace, counted in
+    characters like ``start``.
+    """
+    rest = string[start:]
+    expr, row, column = parse_expr(io.BytesIO(rest.encode("utf-8")))
+    # The column, after the brace, is in characters of the brace's line.
+    line_start = sum(len(line) + 1 for line in rest.split("\n")[:row])
+    return expr, start + line_start + column - 1
+
+
+def split_tokenize(string: str, compile_exprs: bool = False) -> tuple[tuple[str, ...], tuple[str, ...]]:
+    """Split a template, finding expressions with the ``tokenize`` module."""
     data = string.encode("utf-8")
     bio = io.BytesIO(data)
 
@@ -43,10 +130,10 @@ def split(string: str, compile_exprs: bool = False) -> tuple[tuple[str, ...], tu
         exprs.append(expr if not compile_exprs else compile(expr, "", "eval"))
 
         start_row = bisect(row_offsets, start) - 1
-        if row > 0:
-            start = row_offsets[row + start_row] + column
-        else:
-            start = start + column
+        line_start = row_offsets[row + start_row] if row > 0 else start
+        # The column is in characters, the offsets in bytes.
+        text = data[line_start:].split(b"\n", 1)[0].decode("utf-8")
+        start = line_start + len(text[:column].encode("utf-8"))
 
     return tuple(strings), tuple(exprs)
 
@@ -67,23 +154,81 @@ def parse_expr(bio: io.BytesIO) -> tuple[str, int, int]:
     raise ParseError("unterminated expression")
 
 
-def tag(func: Callable[..., object] | None = None, *, cache_maxsize: int = 128) -> object:
-    cached_split = functools.lru_cache(cache_maxsize)(split)
+def compile_exprs(exprs: tuple[str, ...]) -> CodeType:
+    """Compile all expressions into one code object evaluating to a tuple."""
+    for expr in exprs:
+        # Compile each on its own first, so a bad expression can't
+        # escape its parentheses in the combined source below.
+        compile(expr, "", "eval")
+    # Each expression ends with a newline so a trailing comment can't
+    # swallow the closing parenthesis.
+    source = "(" + "".join(f"({expr}\n)," for expr in exprs) + ")"
+    return compile(source, "", "eval")
+
+
+@template_cache("split")
+def split_compiled(string: str) -> tuple[tuple[str, ...], CodeType | None]:
+    """Split a template, compiling its expressions into a single code object."""
+    strings, exprs = split(string)
+    return strings, compile_exprs(exprs) if exprs else None
+
+
+SplitCache = TemplateCache[str, tuple[tuple[str, ...], CodeType | None]]
+
+
+T_co = TypeVar("T_co", covariant=True)
+
+
+class Tagged(Protocol[T_co]):
+    """A tagged template function, optionally given an explicit namespace."""
+
+    def __call__(self, string: str, namespace: Mapping[str, Any] | None = None) -> T_co:
+        ...
+
+
+@overload
+def tag(func: Callable[..., T_co]) -> Tagged[T_co]:
+    ...
+
+
+@overload
+def tag(
+        func: None = None, *, cache: SplitCache | None = None, cache_maxsize: int | None = None
+) -> Callable[[Callable[..., T_co]], Tagged[T_co]]:
+    ...
+
+
+def tag(
+        func: Callable[..., T_co] | None = None,
+        *,
+        cache: SplitCache | None = None,
+        cache_maxsize: int | None = None,
+) -> Tagged[T_co] | Callable[[Callable[..., T_co]], Tagged[T_co]]:
+    """Make a tagged template function of ``func(strings, values)``.
+
+    Templates are split with ``cache``, or the shared "split" cache.
+    ``cache_maxsize`` is deprecated: it gives a private cache of that size.
+    """
+    cached_split = tag_cache(split_compiled, cache, cache_maxsize)
 
-    def _tag(func: Callable[..., object]) -> object:
+    def _tag(func: Callable[..., T_co]) -> Tagged[T_co]:
         @functools.wraps(func)
-        def __tag(string: str) -> object:
-            strings, exprs = cached_split(string, compile_exprs=True)
-
-            stack = inspect.stack()
-            f_globals = stack[1].frame.f_globals
-            f_locals = stack[1].frame.f_locals
-            del stack
-
-            values = []
-            for expr in exprs:
-                values.append(eval(expr, f_globals, f_locals))
-            return func(strings, tuple(values))
+        def __tag(string: str, namespace: Mapping[str, Any] | None = None) -> T_co:
+            strings, code = cached_split(string)
+            if code is None:
+                # Nothing to evaluate, e.g. an f-string already interpolated.
+                return func(strings, ())
+
+            if namespace is not None:
+                f_globals, f_locals = NAMESPACE_GLOBALS, namespace
+            else:
+                # Only the immediate caller is needed, so grab its frame
+                # directly instead of building the whole stack.
+                frame = sys._getframe(1)
+                f_globals, f_locals = frame.f_globals, frame.f_locals
+                del frame
+
+            return func(strings, eval(code, f_globals, f_locals))
 
         return __tag
 
@@ -0,0 +1,121 @@
+"""Index a resource tree, to find resources by path without walking it.
+
+Resources only know their ``name`` and ``parent``. ``ResourceTree`` keeps,
+for each resource it holds, its path, its lineage from the root and its
+children, and a mapping from paths back to resources. Paths look like
+URLs: the root is ``/`` and its child ``docs`` is ``/docs``.
+"""
+from __future__ import annotations
+
+import threading
+from contextlib import AbstractContextManager
+from typing import Iterable, Iterator
+
+from .resource import Resource, resource_context
+
+
+def normalize_path(path: str) -> str:
+    """The canonical form of a path: one leading slash, no trailing one."""
+    return "/" + "/".join(part for part in path.split("/") if part)
+
+
+class ResourceTree:
+    """A path index over resources, kept up to date as they are added.
+
+    Resources are identified by the objects themselves, not by equality.
+    Lookups are dict accesses. ``add`` and ``remove`` take a lock, so one
+    tree can serve requests from several threads while it changes.
+    """
+
+    def __init__(self, resources: Iterable[Resource] = ()) -> None:
+        self._by_path: dict[str, Resource] = {}
+        self._paths: dict[int, str] = {}
+        self._lineages: dict[int, tuple[Resource, ...]] = {}
+        self._children: dict[int, list[Resource]] = {}
+        self._lock = threading.RLock()
+        for resource in resources:
+            self.add(resource)
+
+    def add(self, resource: Resource) -> str:
+        """Index a resource, and any ancestors not yet indexed, returning its path."""
+        with self._lock:
+            existing = self._paths.get(id(resource))
+            if existing is not None:
+                return existing
+
+            parent = resource.parent
+            lineage: tuple[Resource, ...]
+            if parent is None:
+                path, lineage = "/", (resource,)
+            else:
+                parent_path = self.add(parent)
+                name = resource.name
+                if not name or "/" in name:
+                    raise ValueError(f"resource name {name!r} can't be used in a path")
+                path = f"{parent_path.rstrip('/')}/{name}"
+                lineage = self._lineages[id(parent)] + (resource,)
+
+            if path in self._by_path:
+                raise ValueError(f"another resource already has the path {path!r}")
+            self._by_path[path] = resource
+            self._paths[id(resource)] = path
+            self._lineages[id(resource)] = lineage
+            self._children[id(resource)] = []
+            if parent is not None:
+                self._children[id(parent)].append(resource)
+            return path
+
+    def remove(self, resource: Resource) -> None:
+        """Remove a resource and everything below it."""
+        with self._lock:
+            if id(resource) not in self._paths:
+                raise KeyError(resource)
+            if resource.parent is not None:
+                siblings = self._children[id(resource.parent)]
+                siblings[:] = [sibling for sibling in siblings if sibling is not resource]
+
+            stack = [resource]
+            while stack:
+                node = stack.pop()
+                stack.extend(self._children.pop(id(node)))
+                del self._by_path[self._paths.pop(id(node))]
+                del self._lineages[id(node)]
+
+    def find(self, path: str) -> Resource:
+        """The resource at a path, raising ``KeyError`` if there is none."""
+        try:
+            return self._by_path[path]
+        except KeyError:
+            return self._by_path[normalize_path(path)]
+
+    def get(self, path: str, default: Resource | None = None) -> Resource | None:
+        try:
+            return self.find(path)
+        except KeyError:
+            return default
+
+    def path(self, resource: Resource) -> str:
+        return self._paths[id(resource)]
+
+    def lineage(self, resource: Resource) -> tuple[Resource, ...]:
+        """The resources from the root down to this one, included."""
+        return self._lineages[id(resource)]
+
+    def children(self, resource: Resource) -> tuple[Resource, ...]:
+        return tuple(self._children[id(resource)])
+
+    def resource_context(self, path: str) -> AbstractContextManager[Resource]:
+        """Make the resource at a path current, e.g. to route a request."""
+        return resource_context(self.find(path))
+
+    def __contains__(self, resource: object) -> bool:
+        return id(resource) in self._paths
+
+    def __iter__(self) -> Iterator[Resource]:
+        return iter(list(self._by_path.values()))
+
+    def __len__(self) -> int:
+        return len(self._by_path)
+
+
+__all__ = ["ResourceTree", "normalize_path"]
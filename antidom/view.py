@@ -1,7 +1,8 @@
 from typing import Callable, Protocol, Type, TypeVar
 
-from antidote import implements, interface, world, inject
+from antidote import implements, interface, inject
 
+from antidom.registry import ImplementationCache, register_per_request
 from antidom.viewdom import VDOM
 from antidom.resource import Resource
 
@@ -15,10 +16,14 @@ class View(Protocol):
 
 V = TypeVar('V', bound=Type[View])
 
+views = ImplementationCache(View)
+
 
 def view(context: Type[Resource]) -> Callable[[V], V]:
     def decorate(cls: V) -> V:
+        register_per_request(cls)
         implements(View).when(qualified_by=context)(cls)
+        views.clear()
         return cls
 
     return decorate
@@ -27,7 +32,5 @@ def view(context: Type[Resource]) -> Callable[[V], V]:
 @inject
 def get_view(this_resource: Resource = inject.me()) -> View:
     """Find the correct view for the context."""
-    context_type = this_resource.__class__
-    views = world.get[View]  # type: ignore
-    this_view = views.single(qualified_by=context_type)
+    this_view: View = views.get(this_resource.__class__)
     return this_view
@@ -1,18 +1,21 @@
 """ViewDOM."""
 from __future__ import annotations
 
-import functools
+import json
 import re
+import sys
 from collections.abc import ByteString
 from collections.abc import Iterable
 from dataclasses import dataclass
 from typing import Callable, Any, Mapping, Sequence, cast, Protocol
-from typing import Generator, Literal
+from typing import Generator, Iterator, Literal
 from typing import Optional
 
 from antidote import world
 
-from .tagged import tag, ParseError
+from .cache import TemplateCache, tag_cache, template_cache
+from .opcodes import Program, assemble, evaluate
+from .tagged import Tagged, tag, ParseError
 
 
 @dataclass(frozen=True)
@@ -119,7 +122,11 @@ SINGLE_QUOTE = re.compile(r"'")
 PROP_VALUE_END = re.compile(r"(?=/>|>|\s)")
 
 
-def htm_parse(strings: tuple[str, ...]) -> list[Any]:
+def htm_parse_scanner(strings: tuple[str, ...]) -> list[Any]:
+    """Parse template strings with ``Scanner``, a character at a time.
+
+    ``htm_parse`` gives the same ops faster, and falls back to this.
+    """
     scanner = Scanner(strings)
 
     ops: list[Any] = []
@@ -129,7 +136,7 @@ def htm_parse(strings: tuple[str, ...]) -> list[Any]:
             if is_text:
                 value = collapse_ws(value)
                 if value:
-                    ops.append(("CHILD", False, collapse_ws(value)))
+                    ops.append(("CHILD", False, intern_text(value)))
             else:
                 ops.append(("CHILD", True, value))
         if not match:
@@ -147,7 +154,7 @@ def htm_parse(strings: tuple[str, ...]) -> list[Any]:
             slash = False
             is_text, value = scanner.peek()
             if is_text:
-                this_tag = get_simple_token(scanner, TAG_NAME)
+                this_tag = sys.intern(get_simple_token(scanner, TAG_NAME))
                 ops.append(("OPEN", False, this_tag))
             elif value is not None:
                 scanner.pop()
@@ -179,7 +186,7 @@ def htm_parse(strings: tuple[str, ...]) -> list[Any]:
                     ops.append(("SPREAD", True, index))
                 continue
 
-            prop = get_simple_token(scanner, PROP_NAME)
+            prop = sys.intern(get_simple_token(scanner, PROP_NAME))
             is_text, value = scanner.peek()
             if not is_text:
                 if value is None:
@@ -209,6 +216,8 @@ def htm_parse(strings: tuple[str, ...]) -> list[Any]:
                     ops.append(("PROP_SINGLE", prop, False, ""))
                 elif len(prefix) == 1:
                     is_text, value = prefix[0]
+                    if is_text:
+                        value = intern_text(value)
                     ops.append(("PROP_SINGLE", prop, not is_text, value))
                 else:
                     ops.append(("PROP_MULTI", prop, prefix))
@@ -228,6 +237,212 @@ def htm_parse(strings: tuple[str, ...]) -> list[Any]:
     return ops
 
 
+# Where values go in the joined template strings.
+VALUE = "\x00"
+
+# Tokens between tags.
+TEXT_TOKEN = re.compile(r"(?P<text>[^<\x00]+)|(?P<value>\x00)|(?P<comment><!--)|(?P<close></)|<")
+
+# Tokens inside a tag, once whitespace is skipped: its end, a spread, or an
+# attribute name with either a quoted value without interpolations or the
+# character after it.
+ATTRIBUTE_NAME_PATTERN = (
+    r"(?P<name>\"[^\"\x00]*\"|'[^'\x00]*'|[^\"'>/=\s\x00]+)"
+    r"(?:=\"(?P<double>[^\"\x00]*)\"|='(?P<single>[^'\x00]*)'|(?P<next>[\s/>=]?))"
+)
+ATTRIBUTE_TOKEN = re.compile(
+    r"\s*(?:(?P<end>/?>)|(?P<spread>" + SPREAD.pattern + r")|" + ATTRIBUTE_NAME_PATTERN + ")"
+)
+ATTRIBUTE_NAME = re.compile(ATTRIBUTE_NAME_PATTERN)
+TAG_NAME_TEXT = re.compile(r"\"[^\"\x00]*\"|'[^'\x00]*'|[^\"'>/\s\x00]+")
+
+
+def unquote(token: str) -> str:
+    if token[0] in "\"'" and token[0] == token[-1]:
+        return token[1:-1]
+    return token
+
+
+def htm_parse(strings: tuple[str, ...]) -> list[Any]:
+    """Parse template strings into ops, in a single pass over them.
+
+    The strings are joined with ``VALUE`` marking each interpolation, then
+    tokenized with one regular expression between tags and one inside
+    them. Gives the same ops as ``htm_parse_scanner``.
+    """
+    if any(VALUE in string for string in strings):
+        return htm_parse_scanner(strings)
+    joined = VALUE.join(strings)
+    end = len(joined)
+    ops: list[Any] = []
+    append = ops.append
+    intern = sys.intern
+    text_token = TEXT_TOKEN.match
+    attribute_token = ATTRIBUTE_TOKEN.match
+    # The index of the next value, the number of VALUE seen so far.
+    value_index = 0
+    # Unbalanced tags are only reported once the whole template parsed,
+    # as the scanner does.
+    depth = 0
+    unopened = False
+
+    def values_in(start: int, stop: int) -> tuple[tuple[bool, str | int], ...]:
+        """The texts and values between two positions, like ``Scanner.search``."""
+        nonlocal value_index
+        prefix: list[tuple[bool, str | int]] = []
+        parts = joined[start:stop].split(VALUE)
+        for part in parts[:-1]:
+            if part:
+                prefix.append((True, part))
+            prefix.append((False, value_index))
+            value_index += 1
+        if parts[-1]:
+            prefix.append((True, parts[-1]))
+        return tuple(prefix)
+
+    pos = 0
+    while pos < end:
+        match = text_token(joined, pos)
+        assert match is not None
+        kind = match.lastgroup
+        pos = match.end()
+        if kind == "text":
+            value = match.group()
+            if "\n" in value:
+                value = collapse_ws(value)
+                if not value:
+                    continue
+            append(("CHILD", False, intern_text(value)))
+            continue
+        if kind == "value":
+            append(("CHILD", True, value_index))
+            value_index += 1
+            continue
+        if kind == "comment":
+            stop = joined.find("-->", pos)
+            if stop < 0:
+                raise ParseError("missing comment end")
+            value_index += joined.count(VALUE, pos, stop)
+            pos = stop + 3
+            continue
+
+        slash = kind == "close"
+        if not slash:
+            if pos == end:
+                raise ParseError("unexpected end of data")
+            if joined[pos] == VALUE:
+                append(("OPEN", True, value_index))
+                value_index += 1
+                pos += 1
+            else:
+                match = TAG_NAME_TEXT.match(joined, pos)
+                if not match:
+                    raise ParseError("no token found")
+                append(("OPEN", False, intern(unquote(match.group()))))
+                pos = match.end()
+            depth += 1
+
+        while True:
+            match = attribute_token(joined, pos)
+            if match is None:
+                pos = WHITESPACE.match(joined, pos).end()  # type: ignore
+                if pos == end:
+                    raise ParseError("unexpected end of data")
+                if joined[pos] == VALUE:
+                    raise ParseError("expression not allowed")
+                raise ParseError("no token found")
+
+            tag_end, spread, name, double, single, after = match.groups()
+            if tag_end is not None:
+                if tag_end == "/>":
+                    slash = True
+                if slash:
+                    append(("CLOSE",))
+                    depth -= 1
+                    unopened = unopened or depth < 0
+                pos = match.end()
+                break
+
+            if spread is not None:
+                pos = match.end()
+                if joined.startswith(VALUE, pos):
+                    if not slash:
+                        append(("SPREAD", True, value_index))
+                    value_index += 1
+                    pos += 1
+                    continue
+                # Like the scanner, go on with a name after the spread.
+                match = ATTRIBUTE_NAME.match(joined, pos)
+                if match is None:
+                    raise ParseError("no token found")
+                name, double, single, after = match.groups()
+
+            prop = intern(unquote(name))
+            quoted = double if single is None else single
+            if quoted is not None:
+                # The common case, a quoted value in a single string.
+                append(("PROP_SINGLE", prop, False, intern_text(quoted) if quoted else ""))
+                pos = match.end()
+                continue
+
+            pos = match.end("name")
+            if not after:
+                if pos == end:
+                    raise ParseError("unexpected end of data")
+                if joined[pos] == VALUE:
+                    raise ParseError("expression not allowed here")
+                raise ParseError("invalid character")
+            if after != "=":
+                if not slash:
+                    append(("PROP_SINGLE", prop, False, True))
+                continue
+
+            pos += 1
+            quote = joined[pos] if pos < end else ""
+            if quote == "\"" or quote == "'":
+                stop = joined.find(quote, pos + 1)
+                if stop < 0:
+                    raise ParseError("unexpected end of data")
+                if VALUE in joined[pos + 1:stop]:
+                    prefix = values_in(pos + 1, stop)
+                elif stop > pos + 1:
+                    prefix = ((True, joined[pos + 1:stop]),)
+                else:
+                    prefix = ()
+                pos = stop + 1
+            else:
+                value_end = PROP_VALUE_END.search(joined, pos)
+                if not value_end:
+                    raise ParseError("unexpected end of data")
+                prefix = values_in(pos, value_end.start())
+                pos = value_end.start()
+
+            if not prefix:
+                append(("PROP_SINGLE", prop, False, ""))
+            elif len(prefix) == 1:
+                is_text, item = prefix[0]
+                if is_text:
+                    item = intern_text(cast(str, item))
+                append(("PROP_SINGLE", prop, not is_text, item))
+            else:
+                append(("PROP_MULTI", prop, prefix))
+
+    if unopened:
+        raise ParseError("closing unopened tags")
+    if depth > 0:
+        raise ParseError("all opened tags not closed")
+    return ops
+
+
+# Static text up to this length is interned, so the same words, class
+# names or attribute values in different templates share one string.
+INTERN_MAX_LENGTH = 64
+
+
+def intern_text(value: str) -> str:
+    return sys.intern(value) if len(value) <= INTERN_MAX_LENGTH else value
+
+
 HtmEvalValue = str | VDOMNode
 HtmEval = HtmEvalValue | Sequence[HtmEvalValue]
 
@@ -235,7 +450,7 @@ HtmEval = HtmEvalValue | Sequence[HtmEvalValue]
 def htm_eval(
         h: Callable[..., object],
         ops: list[Any],
-        values: tuple[type],
+        values: Sequence[Any],
 ) -> HtmEval:
     root: list[HtmEvalValue] = []
     stack: list[tuple[Any, Any, Any]] = [("", {}, root)]
@@ -258,7 +473,7 @@ def htm_eval(
         elif op[0] == "PROP_MULTI":
             _, attr, items = op
             this_tag, props, children = stack[-1]
-            props[attr] = "".join(value if is_text else str(values[value]) for (is_text, value) in items)
+            props[attr] = join_parts(items, values)
         elif op[0] == "CHILD":
             _, value, item = op
             this_tag, props, children = stack[-1]
@@ -271,26 +486,217 @@ def htm_eval(
     return root
 
 
-def htm(cache_maxsize: int = 128) -> Callable[[str], VDOM]:
-    """The callable function to act as decorator."""
-    cached_parse = functools.lru_cache(maxsize=cache_maxsize)(htm_parse)
+def htm_mark_static(ops: list[Any]) -> list[Any]:
+    """Mark the text and attribute values written in the template itself.
+
+    They are HTML the template author wrote, entities included, so they
+    become ``Markup`` of the same text and render as written. The
+    serialized form of static attributes and tags is also computed here,
+    ready for ``render_gen``.
+    """
+    marked: list[Any] = []
+    for op in ops:
+        if op[0] == "CHILD" and not op[1] and isinstance(op[2], str):
+            op = ("CHILD", False, static_markup(op[2]))
+        elif op[0] == "PROP_SINGLE" and not op[2] and isinstance(op[3], str):
+            op = ("PROP_SINGLE", op[1], False, static_markup(op[3]))
+            if len(ATTRIBUTE_CACHE) >= SERIALIZED_CACHE_SIZE:
+                ATTRIBUTE_CACHE.clear()
+            ATTRIBUTE_CACHE[op[1], op[3]] = encode_attribute(op[1], op[3])
+        elif op[0] == "PROP_MULTI":
+            op = ("PROP_MULTI", op[1], [
+                (is_text, static_markup(item) if is_text else item) for (is_text, item) in op[2]
+            ])
+        elif op[0] == "OPEN" and not op[1]:
+            tag_strings(op[2])
+        marked.append(op)
+    return marked
+
+
+# Short static text to its Markup, shared by all templates.
+STATIC_MARKUP: dict[str, Markup] = {}
+
+
+def static_markup(value: str) -> Markup:
+    """Mark static template text as markup, reusing it while it is short."""
+    if len(value) > INTERN_MAX_LENGTH:
+        return Markup(value)
+    markup = STATIC_MARKUP.get(value)
+    if markup is None:
+        if len(STATIC_MARKUP) >= SERIALIZED_CACHE_SIZE:
+            STATIC_MARKUP.clear()
+        markup = STATIC_MARKUP[value] = Markup(value)
+    return markup
+
+
+def join_parts(items: Sequence[tuple[bool, Any]], values: Sequence[Any]) -> str:
+    """The value of an attribute mixing text and interpolations.
+
+    If ``htm_mark_static`` marked the text it is kept as written and the
+    values are escaped, giving ``Markup``, otherwise all is plain text.
+    """
+    if any(is_text and type(item) is Markup for (is_text, item) in items):
+        return Markup("".join(item if is_text else escape(values[item]) for (is_text, item) in items))
+    return "".join(item if is_text else str(values[item]) for (is_text, item) in items)
+
+
+def htm_hoist(h: Callable[..., object], ops: list[Any]) -> list[Any]:
+    """Replace subtrees without interpolations by ready-made nodes.
+
+    Each static subtree is built once, here, and becomes a ``CHILD`` op
+    holding the node, so every evaluation of the returned ops shares it.
+    Nodes are frozen, but callers must not mutate the shared children lists.
+    """
+    hoisted: list[Any] = []
+    # The position of each open element in ``hoisted``, and if it is static.
+    stack: list[list[Any]] = []
+    for op in ops:
+        if op[0] == "OPEN":
+            stack.append([len(hoisted), not op[1]])
+        elif op[0] == "CLOSE":
+            start, static = stack.pop()
+            if static:
+                node = htm_eval(h, hoisted[start:] + [op], ())
+                del hoisted[start:]
+                hoisted.append(("CHILD", False, node))
+                continue
+            if stack:
+                stack[-1][1] = False
+        elif stack and (
+                (op[0] == "SPREAD" and op[1])
+                or (op[0] == "PROP_SINGLE" and op[2])
+                or (op[0] == "PROP_MULTI" and not all(is_text for (is_text, _) in op[2]))
+                or (op[0] == "CHILD" and op[1])
+        ):
+            stack[-1][1] = False
+        hoisted.append(op)
+    return hoisted
+
+
+HtmRender = Callable[[Callable[..., object], tuple[Any, ...]], VDOM]
+
+
+def htm_compile(ops: list[Any]) -> HtmRender:
+    """Generate a Python function equivalent to ``htm_eval`` for these ops.
+
+    Every node becomes one nested ``h(tag, {props}, [children])`` call in a
+    single expression, so rendering does no op dispatch at all.
+    """
+    namespace: dict[str, Any] = {}
+
+    def const(item: object) -> str:
+        if type(item) is str:
+            return repr(item)
+        name = f"_c{len(namespace)}"
+        namespace[name] = item
+        return name
+
+    def operand(value: bool, item: Any) -> str:
+        return f"values[{item!r}]" if value else const(item)
+
+    root: list[str] = []
+    stack: list[tuple[str, list[str], list[str]]] = [("", [], root)]
+    for op in ops:
+        if op[0] == "OPEN":
+            _, value, this_tag = op
+            stack.append((operand(value, this_tag), [], []))
+        elif op[0] == "CLOSE":
+            this_tag, props, children = stack.pop()
+            stack[-1][2].append(
+                f"h({this_tag}, {{{', '.join(props)}}}, [{', '.join(children)}])"
+            )
+        elif op[0] == "SPREAD":
+            _, value, item = op
+            stack[-1][1].append(f"**dict({operand(value, item)})")
+        elif op[0] == "PROP_SINGLE":
+            _, attr, value, item = op
+            stack[-1][1].append(f"{const(attr)}: {operand(value, item)}")
+        elif op[0] == "PROP_MULTI":
+            _, attr, items = op
+            stack[-1][1].append(f"{const(attr)}: {_multi_source(items, const)}")
+        elif op[0] == "CHILD":
+            _, value, item = op
+            stack[-1][2].append(operand(value, item))
+        else:
+            raise ValueError("unknown op")
+
+    result = root[0] if len(root) == 1 else f"[{', '.join(root)}]"
+    source = f"def _render(h, values):\n    return {result}\n"
+    try:
+        exec(compile(source, "<htm>", "exec"), namespace)
+    except (SyntaxError, RecursionError, MemoryError):
+        # Too deeply nested for the Python parser; interpret instead.
+        program = assemble(ops)
+        return lambda h, values: evaluate(h, program, values, join_parts)
+    return cast(HtmRender, namespace["_render"])
+
+
+@template_cache("htm")
+def htm_prepare(strings: tuple[str, ...]) -> HtmRender:
+    """Parse and compile template strings for ``htm``."""
+    return htm_prepare_ops(htm_parse(strings))
+
+
+def htm_prepare_ops(ops: list[Any]) -> HtmRender:
+    """Mark, hoist and compile parsed ops for ``htm``."""
+    return htm_compile(htm_hoist(VDOMNode, htm_mark_static(ops)))
+
+
+def htm(
+        cache: TemplateCache[tuple[str, ...], HtmRender] | None = None,
+        cache_maxsize: int | None = None,
+) -> Tagged[VDOM]:
+    """The callable function to act as decorator.
+
+    ``cache_maxsize`` is deprecated in favour of passing a ``cache``.
+    """
+    cached_compile = tag_cache(htm_prepare, cache, cache_maxsize)
 
     @tag
-    def __htm(strings: tuple[str, ...], values: tuple[type]) -> HtmEval:
-        ops = cached_parse(strings)
-        return htm_eval(VDOMNode, ops, values)
+    def __htm(strings: tuple[str, ...], values: tuple[type]) -> VDOM:
+        return cached_compile(strings)(VDOMNode, values)
 
-    return cast(Callable[[str], VDOM], __htm)
+    return __htm
 
 
-def escape(fake: object) -> str:
-    # TODO Consider using MarkupSafe for escaping
-    return str(fake)
+class Markup(str):
+    """A string which is already safe HTML, so is never escaped again.
+
+    Objects with an ``__html__`` method, as in MarkupSafe, are also trusted.
+    """
+
+    __slots__ = ()
+
+    def __html__(self) -> Markup:
+        return self
+
+
+def escape(value: object) -> str:
+    """Escape a value for use in HTML text or a quoted attribute."""
+    if type(value) is str:
+        string = value
+    elif type(value) is Markup:
+        return value
+    elif hasattr(value, "__html__"):
+        return cast(str, value.__html__())
+    else:
+        string = str(value)
+    # Most text has nothing to escape, and these scans are cheap.
+    if not ("&" in string or "<" in string or ">" in string
+            or '"' in string or "'" in string):
+        return string
+    return (
+        string.replace("&", "&amp;")
+        .replace("<", "&lt;")
+        .replace(">", "&gt;")
+        .replace('"', "&#34;")
+        .replace("'", "&#39;")
+    )
 
 
 # "void" elements are allowed to be self-closing
 # https://html.spec.whatwg.org/multipage/syntax.html#void-elements
-VOIDS = (
+VOIDS = frozenset((
     "area",
     "base",
     "br",
@@ -306,7 +712,67 @@ VOIDS = (
     "source",
     "track",
     "wbr",
-)
+))
+
+# Bounds for the caches of serialized tags and static attributes, which
+# are filled from templates and so could grow with dynamic f-strings.
+SERIALIZED_CACHE_SIZE = 4096
+
+# Tag name to its opening "<tag", closing "</tag>" and childless endings,
+# and whether its text is raw.
+TAG_STRINGS: dict[str, tuple[str, str, str, bool]] = {}
+
+# (name, Markup value) of static attributes to their serialized form.
+ATTRIBUTE_CACHE: dict[tuple[str, str], str] = {}
+
+
+# Elements whose text is not HTML, so entities aren't decoded in it.
+# https://html.spec.whatwg.org/multipage/syntax.html#raw-text-elements
+RAW_TEXT = frozenset(("script", "style"))
+
+
+def raw_text(value: object) -> object:
+    """Check text interpolated in a ``RAW_TEXT`` element.
+
+    Escaping would change the meaning of JS or CSS and leaving it as is
+    would let it close the element, so plain strings are refused: data is
+    inlined with ``inline_json`` and trusted code as ``Markup``.
+    """
+    if isinstance(value, str) and not hasattr(value, "__html__"):
+        raise ValueError(
+            "strings in <script> or <style> must be Markup, use inline_json() for data"
+        )
+    return value
+
+
+def inline_json(value: object) -> Markup:
+    """Serialize as JSON safe to inline in a ``<script>`` or an attribute.
+
+    ``<``, ``>`` and ``&`` are written as JSON escapes, so the result can't
+    close the element or hold an entity, and means the same to JS.
+    """
+    return Markup(
+        json.dumps(value)
+        .replace("<", "\\u003c")
+        .replace(">", "\\u003e")
+        .replace("&", "\\u0026")
+    )
+
+
+def tag_strings(this_tag: str) -> tuple[str, str, str, bool]:
+    """The opening, closing and childless markup of a tag, and if its text is raw."""
+    try:
+        return TAG_STRINGS[this_tag]
+    except KeyError:
+        pass
+    name = escape(this_tag)
+    closing = f"</{name}>"
+    lower = this_tag.lower()
+    empty = "/>" if lower in VOIDS else f">{closing}"
+    strings = TAG_STRINGS[this_tag] = (f"<{name}", closing, empty, lower in RAW_TEXT)
+    if len(TAG_STRINGS) > SERIALIZED_CACHE_SIZE:
+        TAG_STRINGS.clear()
+    return strings
 
 html = htm()
 
@@ -317,23 +783,36 @@ class Component(Protocol):
         ...
 
 
+class HasHTML(Protocol):
+    """Already rendered, e.g. ``Markup`` or a ``CompactVDOM``."""
+
+    def __html__(self) -> str:
+        ...
+
+
 def flatten(
         value: Sequence[str | VDOMNode] | VDOMNode | Component
 ) -> Generator[VDOMNode | str, Any, Any]:
     """Reduce a sequence."""
-    if isinstance(value, Iterable) and not isinstance(
-            value, (VDOMNode, str, ByteString)
-    ):
-        for item in value:
-            yield from flatten(item)
-    elif isinstance(value, str) or isinstance(value, VDOMNode):
-        yield value
-    elif hasattr(value, '__vdom__'):
-        # E.g. a dataclass with an __vdom__ method
-        vdom = value.__vdom__()
-        yield vdom
-    else:
-        raise ValueError("Unknown flattened value")
+    # An explicit stack of iterators, so nesting doesn't add generator frames.
+    stack: list[Iterator[Any]] = [iter((value,))]
+    while stack:
+        for item in stack[-1]:
+            if isinstance(item, Iterable) and not isinstance(
+                    item, (VDOMNode, str, ByteString)
+            ):
+                stack.append(iter(item))
+                break
+            elif isinstance(item, str) or isinstance(item, VDOMNode):
+                yield item
+            elif hasattr(item, '__vdom__'):
+                # E.g. a dataclass with an __vdom__ method
+                vdom = item.__vdom__()
+                yield vdom
+            else:
+                raise ValueError("Unknown flattened value")
+        else:
+            stack.pop()
 
 
 def relaxed_call(
@@ -347,6 +826,11 @@ def relaxed_call(
         props = {}
     full_props = props | dict(children=children)  # noqa
 
+    # Memoized components render once per props and context.
+    memo = getattr(callable_, "__memoize__", None)
+    if memo is not None:
+        return cast(VDOM, memo(props, lambda: call_component(callable_)))
+
     # Get a constructed instance from the Antidote world.
     # TODO Provide the props in some manner.
     # TODO If the world doesn't know about the callable_ because
@@ -362,47 +846,323 @@ def relaxed_call(
     return cast(VDOMNode, target)
 
 
-def render(value: VDOM) -> str:
+def call_component(callable_: Callable[..., VDOM]) -> VDOM:
+    """Get a component from the world and render it to VDOM right away."""
+    target = world.get(callable_)  # type: ignore
+    if callable(target):
+        return cast(VDOM, target())
+    return cast(VDOM, target.__vdom__())
+
+
+def render(
+        value: Sequence[str | VDOMNode] | VDOMNode | Component | HasHTML
+) -> str:
     """Render a VDOM to a string."""
     return "".join(
         render_gen(value)
     )
 
 
+# Large enough to amortize per-chunk overhead in WSGI/ASGI servers, small
+# enough that the first bytes of a page go out early.
+DEFAULT_CHUNK_SIZE = 16 * 1024
+
+
+def render_chunks(value: VDOM | HasHTML, chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[str]:
+    """Render a VDOM as chunks of at least ``chunk_size`` characters.
+
+    Only the last chunk may be shorter. Use this instead of ``render_gen``
+    to stream a page without sending every tiny fragment separately.
+    """
+    buffer: list[str] = []
+    size = 0
+    for fragment in render_gen(value):
+        buffer.append(fragment)
+        size += len(fragment)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer.clear()
+            size = 0
+    if buffer:
+        yield "".join(buffer)
+
+
+def render_stream(
+        value: VDOM | HasHTML,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        encoding: str = "utf-8",
+) -> Iterator[bytes]:
+    """Render a VDOM as encoded chunks, e.g. for a WSGI response body."""
+    for chunk in render_chunks(value, chunk_size):
+        yield chunk.encode(encoding)
+
+
 def render_gen(
-        value: Sequence[str | VDOMNode] | VDOMNode | Component
+        value: Sequence[str | VDOMNode] | VDOMNode | Component | HasHTML,
+        regions: Callable[[Sequence[Any]], Iterable[Any]] | None = None,
 ) -> Iterable[str]:
-    """Render as a generator."""
-    for item in flatten(value):
-        if isinstance(item, VDOMNode):
-            this_tag, props, children = item.tag, item.props, item.children
-
-            # Is this_tag a callable component, or just '<div>'?
-            if callable(this_tag):
-                yield from render_gen(
-                    relaxed_call(this_tag, props=props)
-                )
-                continue
-
-            yield f"<{escape(this_tag)}"
-            if props:
-                pi = props.items()
-                yield f" {' '.join(encode_prop(k, v) for (k, v) in pi)}"
-
-            if children:
-                yield ">"
-                yield from render_gen(children)
-                yield f"</{escape(this_tag)}>"
-            elif this_tag.lower() in VOIDS:
-                yield "/>"
+    """Render as a generator.
+
+    Walks the tree with an explicit stack of (items, closing tag) pairs
+    instead of recursing, so the cost of each fragment and the maximum
+    depth don't depend on how deeply the tree is nested.
+
+    ``regions``, if given, gets the children of each node and the items of
+    each list before they are rendered, and returns the items to render
+    instead, e.g. with components replaced by placeholders with ``__html__``.
+    """
+    stack: list[tuple[Iterator[Any], str | None]] = [(iter((value,)), None)]
+    while stack:
+        items, closing = stack[-1]
+        for item in items:
+            if isinstance(item, VDOMNode):
+                this_tag, props, children = item.tag, item.props, item.children
+
+                # Is this_tag a callable component, or just '<div>'?
+                if callable(this_tag):
+                    result = relaxed_call(this_tag, props=props)
+                    stack.append((iter((result,)), None))
+                    break
+
+                opening, closing_tag, empty, raw = tag_strings(this_tag)
+                yield opening
+                if props:
+                    yield encode_props(props)
+
+                if children:
+                    yield ">"
+                    if raw:
+                        stack.append((map(raw_text, children), closing_tag))
+                    elif regions is not None:
+                        stack.append((iter(regions(children)), closing_tag))
+                    else:
+                        stack.append((iter(children), closing_tag))
+                    break
+                yield empty
+            elif isinstance(item, str):
+                yield escape(item)
+            elif hasattr(item, '__html__'):
+                # Already rendered, e.g. a CompactVDOM.
+                yield item.__html__()
+            elif isinstance(item, Iterable) and not isinstance(item, ByteString):
+                if regions is not None:
+                    item = regions(list(item))
+                stack.append((iter(item), None))
+                break
+            elif hasattr(item, '__vdom__'):
+                # E.g. a dataclass with an __vdom__ method
+                vdom = item.__vdom__()
+                if isinstance(vdom, (VDOMNode, Iterable)) and not isinstance(
+                        vdom, (str, ByteString)
+                ):
+                    stack.append((iter((vdom,)), None))
+                    break
+                elif vdom not in (True, False, None):
+                    yield escape(vdom)
             else:
-                yield f"></{this_tag}>"
-        elif item not in (True, False, None):  # type: ignore
-            yield escape(item)
+                raise ValueError("Unknown flattened value")
+        else:
+            stack.pop()
+            if closing is not None:
+                yield closing
 
 
 def encode_prop(k: str, v: object | Literal[True]) -> str:
     """If possible, reduce an attribute to just the name."""
+    return encode_attribute(k, v)[1:]
+
+
+def encode_attribute(k: str, v: object) -> str:
+    """Serialize an attribute with a leading space, or drop it entirely.
+
+    ``True`` reduces it to just the name, ``False`` and ``None`` omit it.
+    Lists and tuples, e.g. of classes, are joined by spaces and dicts, e.g.
+    of styles, become ``name: value`` pairs joined by semicolons.
+    """
+    if type(v) is Markup:
+        cached = ATTRIBUTE_CACHE.get((k, v))
+        if cached is not None:
+            return cached
     if v is True:
-        return escape(k)
-    return f'{escape(k)}="{escape(v)}"'
+        return f" {escape(k)}"
+    if v is False or v is None:
+        return ""
+    if type(v) is int:
+        value = str(v)
+    elif isinstance(v, (list, tuple)):
+        value = " ".join(escape(item) for item in v if item is not None and item is not False)
+    elif isinstance(v, dict):
+        value = "; ".join(
+            f"{escape(name)}: {escape(item)}"
+            for (name, item) in v.items() if item is not None and item is not False
+        )
+    else:
+        value = escape(v)
+        if '"' in value:
+            # Markup, e.g. from a single quoted template attribute, may
+            # still hold the quote delimiting the value.
+            value = value.replace('"', "&#34;")
+    return f' {escape(k)}="{value}"'
+
+
+def htm_compile_string(ops: list[Any]) -> Callable[[tuple[Any, ...]], str]:
+    """Generate a function rendering these ops straight to a string.
+
+    Static markup is rendered once, here, leaving only the interpolated
+    values to stringify per call. The result matches ``render(htm_eval(...))``.
+    Subtrees with an interpolated tag, such as components, are still built
+    as VDOM and rendered when called.
+    """
+    namespace: dict[str, Any] = dict(
+        render=render, encode_attribute=encode_attribute, render_subtree=render_subtree,
+        encode_props=encode_props, raw_text=raw_text,
+    )
+
+    def const(item: object) -> str:
+        name = f"_c{len(namespace)}"
+        namespace[name] = item
+        return name
+
+    parts: list[str] = []
+    static: list[str] = []
+
+    def flush() -> None:
+        if static:
+            parts.append(repr("".join(static)))
+            static.clear()
+
+    def emit(source: str | None = None, text: str = "") -> None:
+        if source is None:
+            static.append(text)
+        else:
+            flush()
+            parts.append(source)
+
+    # The closing markup of the open elements, and if their text is raw.
+    stack: list[tuple[str, bool]] = []
+    index = 0
+    while index < len(ops):
+        op = ops[index]
+        if op[0] == "OPEN":
+            _, value, this_tag = op
+            end = index + 1
+            while ops[end][0] in ("SPREAD", "PROP_SINGLE", "PROP_MULTI"):
+                end += 1
+            if value:
+                close = end
+                depth = 1
+                while depth:
+                    if ops[close][0] == "OPEN":
+                        depth += 1
+                    elif ops[close][0] == "CLOSE":
+                        depth -= 1
+                    close += 1
+                emit(f"render_subtree({const(assemble(ops[index:close]))}, values)")
+                index = close
+                continue
+
+            opening, closing, empty, raw = tag_strings(this_tag)
+            emit(text=opening)
+            prop_ops = ops[index + 1:end]
+            names = [prop[1] for prop in prop_ops if prop[0] != "SPREAD"]
+            if len(names) != len(prop_ops) or len(set(names)) != len(names):
+                # Spreads and repeated names need real dict semantics.
+                emit(f"encode_props({_props_source(prop_ops, const)})")
+            else:
+                for kind, attr, *rest in prop_ops:
+                    if kind == "PROP_SINGLE" and not rest[0]:
+                        emit(text=encode_attribute(attr, rest[1]))
+                    elif kind == "PROP_SINGLE":
+                        emit(f"encode_attribute({attr!r}, values[{rest[1]!r}])")
+                    else:
+                        emit(f"encode_attribute({attr!r}, {_multi_source(rest[0], const)})")
+
+            if ops[end][0] == "CLOSE":
+                emit(text=empty)
+                index = end + 1
+                continue
+            emit(text=">")
+            stack.append((closing, raw))
+            index = end
+            continue
+        elif op[0] == "CLOSE":
+            emit(text=stack.pop()[0])
+        elif op[0] == "CHILD":
+            _, value, item = op
+            if value and stack and stack[-1][1]:
+                emit(f"render(raw_text(values[{item!r}]))")
+            elif value:
+                emit(f"render(values[{item!r}])")
+            else:
+                emit(text=render(item))
+        else:
+            raise ValueError("unknown op")
+        index += 1
+
+    flush()
+    source = f"def _render(values):\n    return ''.join(({''.join(f'{part}, ' for part in parts)}))\n"
+    exec(compile(source, "<htm>", "exec"), namespace)
+    return cast(Callable[[tuple[Any, ...]], str], namespace["_render"])
+
+
+def _props_source(prop_ops: list[Any], const: Callable[[object], str]) -> str:
+    """A dict display building props as ``htm_eval`` would."""
+    items = []
+    for op in prop_ops:
+        if op[0] == "SPREAD":
+            _, value, item = op
+            items.append(f"**dict({f'values[{item!r}]' if value else const(item)})")
+        elif op[0] == "PROP_SINGLE":
+            _, attr, value, item = op
+            items.append(f"{attr!r}: {f'values[{item!r}]' if value else const(item)}")
+        else:
+            _, attr, multi = op
+            items.append(f"{attr!r}: {_multi_source(multi, const)}")
+    return f"{{{', '.join(items)}}}"
+
+
+def _multi_source(items: Sequence[tuple[bool, Any]], const: Callable[[object], str]) -> str:
+    """An expression joining the parts of a ``PROP_MULTI``, as ``join_parts``."""
+    if any(is_text and type(value) is Markup for (is_text, value) in items):
+        escape_name = const(escape)
+        joined = " + ".join(
+            repr(str(value)) if is_text else f"{escape_name}(values[{value!r}])"
+            for (is_text, value) in items
+        )
+        return f"{const(Markup)}({joined})"
+    return " + ".join(
+        repr(value) if is_text else f"str(values[{value!r}])" for (is_text, value) in items
+    )
+
+
+def render_subtree(program: Program, values: tuple[Any, ...]) -> str:
+    """Build and render part of a template which can't be pre-rendered."""
+    return render(evaluate(VDOMNode, program, values, join_parts))
+
+
+def encode_props(props: Mapping[str, object]) -> str:
+    """Render the attributes of a tag, with a leading space if there are any."""
+    return "".join([encode_attribute(k, v) for (k, v) in props.items()])
+
+
+@template_cache("htm_render")
+def htm_render_prepare(strings: tuple[str, ...]) -> Callable[[tuple[Any, ...]], str]:
+    """Parse and compile template strings for ``htm_render``."""
+    return htm_compile_string(htm_mark_static(htm_parse(strings)))
+
+
+def htm_render(
+        cache: TemplateCache[tuple[str, ...], Callable[[tuple[Any, ...]], str]] | None = None,
+        cache_maxsize: int | None = None,
+) -> Tagged[str]:
+    """Like ``htm``, but render the template directly to a string."""
+    cached_compile = tag_cache(htm_render_prepare, cache, cache_maxsize)
+
+    @tag
+    def __htm(strings: tuple[str, ...], values: tuple[Any, ...]) -> str:
+        return cached_compile(strings)(values)
+
+    return __htm
+
+
+render_html = htm_render()
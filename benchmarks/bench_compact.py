@@ -0,0 +1,55 @@
+"""Compare the memory and render time of VDOMNode and CompactVDOM trees.
+
+Run with ``python -m benchmarks.bench_compact``. Memory is what the tree
+keeps allocated once built, measured with ``tracemalloc``.
+"""
+import gc
+import tracemalloc
+from timeit import timeit
+from typing import Any, Callable
+
+from antidom.compact import CompactVDOM
+from antidom.viewdom import VDOMNode, render
+
+NUMBER = 5
+
+
+def table(rows: int) -> VDOMNode:
+    """A table of ``rows`` rows of five cells, as a dashboard would show."""
+    return VDOMNode("table", {"class": "data"}, [
+        VDOMNode("tr", {"class": "row"}, [
+            VDOMNode("td", {"class": "cell"}, [f"{row}-{col}"]) for col in range(5)
+        ])
+        for row in range(rows)
+    ])
+
+
+def retained(build: Callable[[], Any]) -> tuple[Any, int]:
+    """Build a value, returning it and the bytes it keeps allocated."""
+    gc.collect()
+    tracemalloc.start()
+    value = build()
+    gc.collect()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return value, size
+
+
+def main() -> None:
+    print(f"{'rows':>8} {'nodes KB':>10} {'compact KB':>11} {'ratio':>6}"
+          f" {'nodes ms':>9} {'compact ms':>11}  (render)")
+    for rows in (100, 1000, 10000):
+        nodes, nodes_size = retained(lambda: table(rows))
+        compact, compact_size = retained(lambda: CompactVDOM.from_vdom(table(rows)))
+        assert render(compact) == render(nodes)
+        nodes_time = timeit(lambda: render(nodes), number=NUMBER) / NUMBER
+        compact_time = timeit(lambda: render(compact), number=NUMBER) / NUMBER
+        print(
+            f"{rows:>8} {nodes_size / 1024:>10.0f} {compact_size / 1024:>11.0f}"
+            f" {nodes_size / compact_size:>6.1f}"
+            f" {nodes_time * 1e3:>9.2f} {compact_time * 1e3:>11.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
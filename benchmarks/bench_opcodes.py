@@ -0,0 +1,68 @@
+"""Compare op tuples with integer-opcode programs.
+
+Run with ``python -m benchmarks.bench_opcodes``. Memory is the deep size
+of the parsed template, size is that of its ``marshal`` serialization, and
+time is that of building the VDOM with ``htm_eval`` and ``evaluate``.
+
+The times of the two are within run-to-run noise of each other, the
+program only wins on size.
+"""
+import marshal
+import sys
+from array import array
+from timeit import repeat
+from typing import Any
+
+from antidom.opcodes import assemble, evaluate
+from antidom.tagged import split
+from antidom.viewdom import VDOMNode, htm_eval, htm_parse
+
+NUMBER = 2000
+
+ROW = '<tr class="row"><td>{name}</td><td title="x{name}y">{name}</td><td>static</td></tr>'
+TEMPLATES = {
+    "small": '<p class="greeting">Hello {name}</p>',
+    "table": "<table>" + ROW * 20 + "</table>",
+    "static": "<div>" + '<p class="a"><b>text</b> more text</p>' * 20 + "</div>",
+}
+
+
+def deep_size(value: Any, seen: set[int] | None = None) -> int:
+    """The bytes used by a value and everything it holds, counted once."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    size = sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        size += sum(deep_size(item, seen) for item in value)
+    elif not isinstance(value, (str, int, bool, array)) and value is not None:
+        size += deep_size(value.code, seen) + deep_size(value.constants, seen)
+    return size
+
+
+def best(fn: Any) -> float:
+    return min(repeat(fn, number=NUMBER, repeat=5)) / NUMBER
+
+
+def main() -> None:
+    print(f"{'template':>10} {'ops B':>8} {'program B':>10} {'ops file':>9} {'program file':>13}"
+          f" {'htm_eval':>9} {'evaluate':>9}  (usec/call)")
+    for label, template in TEMPLATES.items():
+        strings, exprs = split(template)
+        values = tuple("World" for _ in exprs)
+        ops = htm_parse(strings)
+        program = assemble(ops)
+        assert evaluate(VDOMNode, program, values) == htm_eval(VDOMNode, ops, values)
+
+        interpreted = best(lambda: htm_eval(VDOMNode, ops, values))
+        dispatched = best(lambda: evaluate(VDOMNode, program, values))
+        print(
+            f"{label:>10} {deep_size(ops):>8} {deep_size(program):>10}"
+            f" {len(marshal.dumps(ops)):>9} {len(program.dumps()):>13}"
+            f" {interpreted * 1e6:>9.2f} {dispatched * 1e6:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
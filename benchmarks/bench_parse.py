@@ -0,0 +1,36 @@
+"""Compare the throughput of the scanner and the single-pass parser.
+
+Run with ``python -m benchmarks.bench_parse``. This is the cost paid on
+every template cache miss, e.g. on a cold start or for dynamic templates.
+"""
+from timeit import timeit
+
+from antidom.tagged import split
+from antidom.viewdom import htm_parse, htm_parse_scanner
+
+NUMBER = 200
+
+ROW = '<tr class="row" data-id={id}><td>{name}</td><td title="x{name}y">{name}</td><td>static</td></tr>'
+TEMPLATES = {
+    "small": '<p class="greeting">Hello {name}</p>',
+    "table": "<table>" + ROW * 20 + "</table>",
+    "static": "<div>" + '<p class="a"><b>text</b> more <i hidden>text</i></p>' * 20 + "</div>",
+    "comments": "<div><!-- a {note} -->" + "<span a=1 b='2' c>x</span>\n  " * 20 + "</div>",
+}
+
+
+def main() -> None:
+    print(f"{'template':>10} {'scanner':>10} {'single':>10} {'speedup':>8}  (MB/s)")
+    for label, template in TEMPLATES.items():
+        strings, _ = split(template)
+        assert htm_parse(strings) == htm_parse_scanner(strings)
+        size = sum(len(string) for string in strings) / 1e6
+        rates = [
+            size * NUMBER / timeit(lambda: parse(strings), number=NUMBER)
+            for parse in (htm_parse_scanner, htm_parse)
+        ]
+        print(f"{label:>10} {rates[0]:>10.2f} {rates[1]:>10.2f} {rates[1] / rates[0]:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+"""Compare resolving a view through Antidote with the per-type cache.
+
+Run with ``python -m benchmarks.bench_registry``.
+"""
+from timeit import timeit
+
+from antidote import world
+
+from antidom.examples.simple_view import Customer, Store
+from antidom.view import View, views
+
+NUMBER = 20000
+
+
+def main() -> None:
+    print(f"{'resource':>10} {'antidote':>10} {'cached':>10}  (usec/lookup)")
+    for resource_type in (Customer, Store):
+        def uncached() -> object:
+            return world.get[View].single(qualified_by=resource_type)  # type: ignore
+
+        def cached() -> object:
+            return views.get(resource_type)
+
+        assert type(uncached()) is type(cached())
+        times = [timeit(fn, number=NUMBER) / NUMBER * 1e6 for fn in (uncached, cached)]
+        print(f"{resource_type.__name__:>10} {times[0]:>10.2f} {times[1]:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
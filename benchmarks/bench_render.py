@@ -0,0 +1,89 @@
+"""Compare the recursive and the explicit-stack render_gen.
+
+Run with ``python -m benchmarks.bench_render``. Times are per fragment, so
+a depth-independent renderer shows flat numbers as trees get deeper. The
+second table times attribute-heavy markup with the previous renderer, which
+serializes every tag and attribute from scratch, and the current one.
+"""
+from collections.abc import ByteString, Iterable
+from timeit import timeit
+from typing import Any, Iterator
+
+from antidom.viewdom import VDOMNode, VOIDS, encode_prop, escape, html, render, render_gen
+
+NUMBER = 20
+
+
+def recursive_flatten(value: Any) -> Iterator[Any]:
+    """The previous flatten, recursing into nested iterables."""
+    if isinstance(value, Iterable) and not isinstance(value, (VDOMNode, str, ByteString)):
+        for item in value:
+            yield from recursive_flatten(item)
+    elif isinstance(value, (str, VDOMNode)):
+        yield value
+    else:
+        raise ValueError("Unknown flattened value")
+
+
+def recursive_render_gen(value: Any) -> Iterator[str]:
+    """The previous render_gen, without component support."""
+    for item in recursive_flatten(value):
+        if isinstance(item, VDOMNode):
+            this_tag, props, children = item.tag, item.props, item.children
+            yield f"<{escape(this_tag)}"
+            if props:
+                yield f" {' '.join(encode_prop(k, v) for (k, v) in props.items())}"
+            if children:
+                yield ">"
+                yield from recursive_render_gen(children)
+                yield f"</{escape(this_tag)}>"
+            elif this_tag.lower() in VOIDS:
+                yield "/>"
+            else:
+                yield f"></{this_tag}>"
+        else:
+            yield escape(item)
+
+
+def deep(depth: int) -> VDOMNode:
+    node = VDOMNode("span", {}, ["leaf"])
+    for _ in range(depth):
+        node = VDOMNode("div", {"class": "level"}, [node])
+    return node
+
+
+def wide(width: int) -> VDOMNode:
+    rows = [VDOMNode("li", {}, [str(i)]) for i in range(width)]
+    return VDOMNode("ul", {}, rows)  # type: ignore
+
+
+def main() -> None:
+    print(f"{'tree':>12} {'recursive':>10} {'stack':>10}  (nsec/fragment)")
+    trees = {f"deep {d}": deep(d) for d in (10, 100, 500)}
+    trees.update({f"wide {w}": wide(w) for w in (10, 1000)})
+    for label, tree in trees.items():
+        fragments = sum(1 for _ in render_gen(tree))
+        assert "".join(render_gen(tree)) == "".join(recursive_render_gen(tree))
+        times = [
+            timeit(lambda: list(fn(tree)), number=NUMBER) / NUMBER / fragments * 1e9
+            for fn in (recursive_render_gen, render_gen)
+        ]
+        print(f"{label:>12} {times[0]:>10.1f} {times[1]:>10.1f}")
+
+    print()
+    print(f"{'template':>12} {'previous':>10} {'current':>10}  (usec/render)")
+    row = '<td class="cell" data-row="r" data-col="c" title="a cell" align="left">x</td>'
+    cells = html("<table>" + ('<tr class="row" role="row">' + row * 10 + "</tr>") * 20 + "</table>")
+    attrs = {
+        "class": ["btn", "btn-primary"], "style": {"color": "red"},
+        "disabled": False, "tabindex": 0, "title": "go",
+    }
+    buttons = [VDOMNode("button", attrs, ["Go"]) for _ in range(200)]
+    for label, page in (("static", cells), ("typed", buttons)):
+        uncached = timeit(lambda: "".join(recursive_render_gen(page)), number=NUMBER)
+        cached = timeit(lambda: render(page), number=NUMBER)
+        print(f"{label:>12} {uncached / NUMBER * 1e6:>10.1f} {cached / NUMBER * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""Measure the per-call overhead of tagged templates.
+
+The first table compares caller frame lookups at varying stack depths, the
+second evaluating many expressions one by one versus as a single code object,
+the third splitting templates on a cache miss with tokenize versus the scanner.
+
+Run with ``python -m benchmarks.bench_tagged``.
+"""
+import functools
+import inspect
+import sys
+from timeit import timeit
+from typing import Any, Callable
+
+from antidom.tagged import compile_exprs, split, split_tokenize, tag
+
+NUMBER = 2000
+DEPTHS = (1, 10, 50, 200)
+
+# Looked up by the templates through the caller's globals.
+name = "World"
+
+
+@tag
+def fast(strings: tuple[str, ...], values: tuple[object, ...]) -> object:
+    return values
+
+
+def stack_tag(func: Callable[..., object]) -> Callable[[str], object]:
+    """The previous implementation, which walked ``inspect.stack()``."""
+    cached_split = functools.lru_cache(128)(split)
+
+    def __tag(string: str) -> object:
+        strings, exprs = cached_split(string, compile_exprs=True)
+        stack = inspect.stack()
+        f_globals = stack[1].frame.f_globals
+        f_locals = stack[1].frame.f_locals
+        del stack
+        values = []
+        for expr in exprs:
+            values.append(eval(expr, f_globals, f_locals))
+        return func(strings, tuple(values))
+
+    return __tag
+
+
+slow = stack_tag(lambda strings, values: values)
+
+
+def at_depth(depth: int, target: Callable[[], Any]) -> Any:
+    if depth <= 1:
+        return target()
+    return at_depth(depth - 1, target)
+
+
+def main() -> None:
+    namespace = dict(name=name)
+
+    def run_fast() -> object:
+        return fast("Hello {name}")
+
+    def run_namespace() -> object:
+        return fast("Hello {name}", namespace)
+
+    def run_slow() -> object:
+        return slow("Hello {name}")
+
+    def noop() -> None:
+        return None
+
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 1000))
+    print("usec/call, minus the cost of recursing to the given depth")
+    print(f"{'depth':>6} {'inspect.stack':>14} {'_getframe':>10} {'namespace':>10}")
+    for depth in DEPTHS:
+        baseline, *timings = [
+            timeit(lambda: at_depth(depth, fn), number=NUMBER) / NUMBER * 1e6
+            for fn in (noop, run_slow, run_fast, run_namespace)
+        ]
+        slow_t, fast_t, ns_t = (t - baseline for t in timings)
+        print(f"{depth:>6} {slow_t:>14.2f} {fast_t:>10.2f} {ns_t:>10.2f}")
+
+    print()
+    print("usec/eval of a template with N expressions")
+    print(f"{'N':>6} {'per-expr':>10} {'combined':>10}")
+    for count in (1, 10, 50):
+        template = "".join(f"<b>{{name}}{i}</b>" for i in range(count))
+        _, exprs = split(template, compile_exprs=True)
+        code = compile_exprs(split(template)[1])
+        env = dict(name=name)
+
+        def per_expr() -> object:
+            values = []
+            for expr in exprs:
+                values.append(eval(expr, env, env))
+            return tuple(values)
+
+        def combined() -> object:
+            return eval(code, env, env)
+
+        per_t, comb_t = (
+            timeit(fn, number=NUMBER) / NUMBER * 1e6 for fn in (per_expr, combined)
+        )
+        print(f"{count:>6} {per_t:>10.2f} {comb_t:>10.2f}")
+
+    print()
+    print("usec/split of a template with N expressions")
+    print(f"{'N':>6} {'tokenize':>10} {'scanner':>10}")
+    for count in (1, 10, 50):
+        template = "".join(f"<b class='{{cls!r}}'>{{items['k{i}']}}</b>" for i in range(count))
+        assert split(template) == split_tokenize(template)
+        slow_t, fast_t = (
+            timeit(lambda: fn(template), number=NUMBER // 10) / (NUMBER // 10) * 1e6
+            for fn in (split_tokenize, split)
+        )
+        print(f"{count:>6} {slow_t:>10.2f} {fast_t:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""Compare interpreting cached op lists with compiled render functions.
+
+The second table shows the effect of hoisting static subtrees on time and
+on the number of allocated blocks, the third compares rendering through VDOM
+with rendering a template straight to a string.
+
+Run with ``python -m benchmarks.bench_viewdom``.
+"""
+import tracemalloc
+from timeit import timeit
+from typing import Any, Callable
+
+from antidom.tagged import split
+from antidom.viewdom import VDOMNode, htm_compile, htm_compile_string, htm_eval, htm_hoist, htm_parse, render
+
+NUMBER = 2000
+
+ROW = '<tr class="row"><td>{name}</td><td title="x{name}y">{name}</td><td>static</td></tr>'
+TEMPLATES = {
+    "small": '<p class="greeting">Hello {name}</p>',
+    "table": "<table>" + ROW * 20 + "</table>",
+    "static": "<div>" + '<p class="a"><b>text</b> more text</p>' * 20 + "</div>",
+}
+
+
+def allocations(fn: Callable[[], Any]) -> int:
+    """The number of memory blocks still held by the result of ``fn``."""
+    tracemalloc.start()
+    before = tracemalloc.take_snapshot()
+    result = fn()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    del result
+    return sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+
+def main() -> None:
+    print(f"{'template':>10} {'htm_eval':>10} {'compiled':>10}  (usec/call)")
+    for label, template in TEMPLATES.items():
+        strings, exprs = split(template)
+        values = tuple("World" for _ in exprs)
+        ops = htm_parse(strings)
+        render_vdom = htm_compile(ops)
+        assert render_vdom(VDOMNode, values) == htm_eval(VDOMNode, ops, values)
+
+        interpreted = timeit(lambda: htm_eval(VDOMNode, ops, values), number=NUMBER)
+        compiled = timeit(lambda: render_vdom(VDOMNode, values), number=NUMBER)
+        print(f"{label:>10} {interpreted / NUMBER * 1e6:>10.2f} {compiled / NUMBER * 1e6:>10.2f}")
+
+    print()
+    print(f"{'template':>10} {'compiled':>10} {'hoisted':>10} {'blocks':>7} {'hoisted':>8}  (usec/call)")
+    for label, template in TEMPLATES.items():
+        strings, exprs = split(template)
+        values = tuple("World" for _ in exprs)
+        ops = htm_parse(strings)
+        plain = htm_compile(ops)
+        hoisted = htm_compile(htm_hoist(VDOMNode, ops))
+        assert plain(VDOMNode, values) == hoisted(VDOMNode, values)
+
+        times = [timeit(lambda: fn(VDOMNode, values), number=NUMBER) / NUMBER * 1e6 for fn in (plain, hoisted)]
+        blocks = [allocations(lambda: fn(VDOMNode, values)) for fn in (plain, hoisted)]
+        print(f"{label:>10} {times[0]:>10.2f} {times[1]:>10.2f} {blocks[0]:>7} {blocks[1]:>8}")
+
+    print()
+    print(f"{'template':>10} {'render(vdom)':>13} {'to string':>10}  (usec/call)")
+    for label, template in TEMPLATES.items():
+        strings, exprs = split(template)
+        values = tuple("World" for _ in exprs)
+        ops = htm_parse(strings)
+        render_vdom = htm_compile(ops)
+        render_string = htm_compile_string(ops)
+        assert render(render_vdom(VDOMNode, values)) == render_string(values)
+
+        via_vdom = timeit(lambda: render(render_vdom(VDOMNode, values)), number=NUMBER)
+        direct = timeit(lambda: render_string(values), number=NUMBER)
+        print(f"{label:>10} {via_vdom / NUMBER * 1e6:>13.2f} {direct / NUMBER * 1e6:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
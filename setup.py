@@ -7,5 +7,11 @@ setup(
     author='Author Name',
     author_email='author@gmail.com',
     description='Description of my package',
-    packages=find_packages()
+    packages=find_packages(),
+    entry_points={
+        'console_scripts': [
+            'antidom-precompile=antidom.precompile:main',
+            'antidom-batch=antidom.batch:main',
+        ],
+    },
 )
@@ -0,0 +1,96 @@
+import asyncio
+from dataclasses import dataclass
+
+from antidote import injectable
+
+from antidom import VDOM, html
+from antidom.aio import render_async, render_gen_async
+from antidom.compact import CompactVDOM
+from antidom.viewdom import VDOMNode
+
+
+@injectable
+@dataclass
+class SlowHeading:
+    async def __call__(self) -> VDOM:
+        await asyncio.sleep(0.1)
+        return html('<h1>Heading</h1>')
+
+
+@injectable
+@dataclass
+class SlowFooter:
+    async def __vdom__(self) -> VDOM:
+        await asyncio.sleep(0.1)
+        return html('<footer>Footer</footer>')
+
+
+@injectable
+@dataclass
+class SyncParagraph:
+    def __call__(self) -> VDOM:
+        return html('<p>Sync</p>')
+
+
+class Meeting:
+    """Lets coroutines on only once all the parties are waiting."""
+
+    def __init__(self, parties: int) -> None:
+        self.parties = parties
+        self.waiting = 0
+        self.event = asyncio.Event()
+
+    async def wait(self) -> None:
+        self.waiting += 1
+        if self.waiting == self.parties:
+            self.event.set()
+        await asyncio.wait_for(self.event.wait(), timeout=5)
+
+
+meeting = Meeting(2)
+
+
+@injectable
+@dataclass
+class WaitingHeading:
+    async def __call__(self) -> VDOM:
+        await meeting.wait()
+        return html('<h1>Heading</h1>')
+
+
+@injectable
+@dataclass
+class WaitingFooter:
+    async def __vdom__(self) -> VDOM:
+        await meeting.wait()
+        return html('<footer>Footer</footer>')
+
+
+def test_render_async() -> None:
+    global meeting
+    meeting = Meeting(2)
+    page = html('<div><{WaitingHeading} /><{SyncParagraph} /><{WaitingFooter} /></div>')
+    # Both components only finish if they wait at the same time.
+    result = asyncio.run(render_async(page))
+    assert result == '<div><h1>Heading</h1><p>Sync</p><footer>Footer</footer></div>'
+
+
+def test_render_gen_async_top_level() -> None:
+    async def collect() -> list[str]:
+        page = html('<{SlowHeading} /><p>between</p><{SlowFooter} />')
+        return [chunk async for chunk in render_gen_async(page)]
+
+    assert asyncio.run(collect()) == [
+        '<h1>Heading</h1>', '<p>between</p>', '<footer>Footer</footer>'
+    ]
+
+
+def test_render_async_static() -> None:
+    page = VDOMNode('p', {'class': 'a'}, ['Hello'])
+    assert asyncio.run(render_async(page)) == '<p class="a">Hello</p>'
+
+
+def test_render_async_compact() -> None:
+    rows = CompactVDOM.from_vdom(VDOMNode('p', {}, ['compact']))
+    page = html('<div>{rows}<{SlowHeading} /></div>')
+    assert asyncio.run(render_async(page)) == '<div><p>compact</p><h1>Heading</h1></div>'
@@ -0,0 +1,51 @@
+from pathlib import Path
+
+import pytest
+
+from antidom.batch import main, render_batch, resource_path
+from antidom.examples.static_site import Document, Folder, site
+
+EXPECTED = {
+    'index.html': '<h1>Home</h1>',
+    'f0/index.html': '<h1>f0</h1>',
+    'f0/about/index.html': '<article><h1>About 0</h1></article>',
+    'f1/index.html': '<h1>f1</h1>',
+    'f1/about/index.html': '<article><h1>About 1</h1></article>',
+}
+
+
+def written(output: Path) -> dict[str, str]:
+    return {
+        path.relative_to(output).as_posix(): path.read_text()
+        for path in output.rglob('*.html')
+    }
+
+
+def test_resource_path() -> None:
+    folder = Folder(name='docs', parent=Folder(name=None, parent=None))
+    assert resource_path(folder) == Path('docs/index.html')
+    assert resource_path(Document(name='a', parent=folder)) == Path('docs/a/index.html')
+    with pytest.raises(ValueError):
+        resource_path(Folder(name='..', parent=None))
+
+
+def test_render_batch_in_process(tmp_path: Path) -> None:
+    report = render_batch(site(2), tmp_path, processes=0)
+    assert written(tmp_path) == EXPECTED
+    assert report.pages == 5
+    assert report.bytes == sum(len(page) for page in EXPECTED.values())
+
+
+def test_render_batch_processes(tmp_path: Path) -> None:
+    report = render_batch(
+        site(2), tmp_path, processes=2, modules=['antidom.examples.static_site'], window=1
+    )
+    assert written(tmp_path) == EXPECTED
+    assert report.pages == 5
+    assert report.pages_per_second > 0
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    assert main(['antidom.examples.static_site:site', '-o', str(tmp_path), '-j', '2']) == 0
+    assert len(written(tmp_path)) == 7
+    assert capsys.readouterr().out.startswith('rendered 7 pages')
@@ -0,0 +1,133 @@
+import pytest
+
+from antidom.cache import BoundedCache, TemplateCache, cache_stats, clear_caches, configure_caches, register_cache
+from antidom.tagged import tag
+from antidom.viewdom import VDOMNode, htm, htm_prepare, html
+
+
+def test_hits_misses_evictions() -> None:
+    cache = TemplateCache('test', str.upper, maxsize=2)
+    assert cache('a') == 'A'
+    assert cache('a') == 'A'
+    cache('b')
+    cache('c')
+    stats = cache.stats()
+    assert (stats.hits, stats.misses, stats.evictions, stats.size) == (1, 3, 1, 2)
+
+
+def test_lru_policy() -> None:
+    cache = TemplateCache('test', str.upper, maxsize=2, policy='lru')
+    cache('a'), cache('b'), cache('a'), cache('c')
+    assert list(cache._entries) == ['a', 'c']
+
+
+def test_fifo_policy() -> None:
+    cache = TemplateCache('test', str.upper, maxsize=2, policy='fifo')
+    cache('a'), cache('b'), cache('a'), cache('c')
+    assert list(cache._entries) == ['b', 'c']
+
+
+def test_disabled_and_unbounded() -> None:
+    disabled = TemplateCache('test', str.upper, maxsize=0)
+    disabled('a'), disabled('a')
+    assert disabled.stats().misses == 2
+    unbounded = TemplateCache('test', str.upper, maxsize=None)
+    for letter in 'abcdef':
+        unbounded(letter)
+    assert unbounded.stats().size == 6
+
+
+def test_warm_and_clear() -> None:
+    cache = TemplateCache('test', str.upper)
+    cache.warm(['a', 'b'])
+    cache('a')
+    assert cache.stats().hits == 1
+    cache.clear()
+    assert cache.stats().as_dict() == dict(
+        name='test', policy='lru', maxsize=128, size=0, hits=0, misses=0, evictions=0
+    )
+
+
+def test_shared_registry() -> None:
+    clear_caches()
+    html('<p>registry</p>')
+    html('<p>registry</p>')
+    stats = cache_stats()
+    assert stats['split']['misses'] == 1
+    assert stats['split']['hits'] == 1
+    assert stats['htm']['misses'] == 1
+    assert stats['htm']['hits'] == 1
+
+    configure_caches(maxsize=0)
+    assert cache_stats()['htm']['size'] == 0
+    configure_caches(maxsize=128)
+
+
+def test_bounded_cache_weight() -> None:
+    cache: BoundedCache[str, str] = BoundedCache('test', maxsize=6, weigh=len)
+    cache.put('a', 'aaa')
+    cache.put('b', 'bbb')
+    assert cache.get('a') == 'aaa'
+    cache.put('c', 'cc')
+    # "b" was the least recently used.
+    assert (cache.get('b'), cache.size, cache.evictions) == (None, 5, 1)
+    cache.put('d', 'd' * 7)
+    assert cache.get('d') is None
+    cache.discard(lambda key, value: key == 'a')
+    assert (list(cache._entries), cache.size) == (['c'], 2)
+
+
+def test_bounded_cache_ttl_and_valid() -> None:
+    now = [0.0]
+    cache: BoundedCache[str, int] = BoundedCache('test', ttl=10, clock=lambda: now[0])
+    cache.put('a', 1)
+    assert cache.get('a', valid=lambda value: value == 2) is None
+    cache.put('a', 1)
+    now[0] = 5
+    assert cache.get('a') == 1
+    now[0] = 10
+    assert cache.get('a') is None
+    assert (cache.hits, cache.misses, cache.size) == (1, 2, 0)
+
+
+def test_register_cache() -> None:
+    first: BoundedCache[str, str] = BoundedCache('test-registered')
+    second: BoundedCache[str, str] = BoundedCache('test-registered')
+    register_cache(first)
+    register_cache(second)
+    register_cache(first)
+    second.put('a', 'b')
+    stats = cache_stats()
+    assert stats['test-registered']['size'] == 0
+    assert stats['test-registered#2']['size'] == 1
+
+
+def test_configure_policy_keeps_sizes() -> None:
+    configure_caches(maxsize=64)
+    try:
+        configure_caches(policy='fifo')
+        assert cache_stats()['htm']['maxsize'] == 64
+        assert cache_stats()['htm']['policy'] == 'fifo'
+    finally:
+        configure_caches(maxsize=128, policy='lru')
+
+
+def test_caller_cache_registered() -> None:
+    own = TemplateCache('own-htm', htm_prepare.build)
+    own_html = htm(cache=own)
+    assert own_html('<p>own</p>') == VDOMNode('p', {}, ['own'])
+    assert cache_stats()['own-htm']['misses'] == 1
+
+
+def test_cache_maxsize_deprecated() -> None:
+    with pytest.warns(DeprecationWarning, match='cache_maxsize'):
+        sized_html = htm(cache_maxsize=1)
+    sized_html('<p>a</p>'), sized_html('<p>b</p>')
+    sized = [stats for (name, stats) in cache_stats().items() if name.startswith('htm#')]
+    assert [(stats['maxsize'], stats['size'], stats['evictions']) for stats in sized] == [(1, 1, 1)]
+
+    with pytest.warns(DeprecationWarning, match='cache_maxsize'):
+        @tag(cache_maxsize=1)
+        def strings(strings: tuple[str, ...], values: tuple[object, ...]) -> tuple[str, ...]:
+            return strings
+    assert strings('a{1}b') == ('a', 'b')
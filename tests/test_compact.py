@@ -0,0 +1,113 @@
+import pytest
+from antidote import injectable
+
+from antidom import VDOM, html
+from antidom.cache import TemplateCache, cache_stats
+from antidom.compact import OBJECT, CompactVDOM, compact_html, compact_prepare, htm_compact, htm_eval_compact
+from antidom.viewdom import Markup, VDOMNode, htm_parse, inline_json, render
+
+
+def table(rows: int) -> VDOMNode:
+    return VDOMNode('table', {}, [
+        VDOMNode('tr', {'class': 'row'}, [VDOMNode('td', {}, [str(i)]), VDOMNode('td', {}, ['x'])])
+        for i in range(rows)
+    ])
+
+
+def test_round_trip() -> None:
+    vdom = VDOMNode('div', {'class': 'a'}, [
+        'Hello ', VDOMNode('b', {}, ['<you>']), VDOMNode('br', {}, []), Markup('&amp;'),
+    ])
+    tree = CompactVDOM.from_vdom(vdom)
+    assert len(tree) == 6
+    assert tree.to_vdom() == vdom
+    assert render(tree) == render(vdom)
+    assert tree.__html__() == '<div class="a">Hello <b>&lt;you&gt;</b><br/>&amp;</div>'
+
+
+def test_interned_tables() -> None:
+    tree = CompactVDOM.from_vdom(table(100))
+    assert tree.names == ['table', 'tr', 'td']
+    # The empty props and one shared by every row.
+    assert len(tree.props) == 2
+    assert render(tree) == render(table(100))
+
+
+def test_interned_props_keep_markup() -> None:
+    """Static "a&amp;b" is Markup, the same text as a value is not."""
+    v = 'a&amp;b'
+    first = '<p title="a&amp;b">1</p><p title={v}>2</p>'
+    second = '<p title={v}>2</p><p title="a&amp;b">1</p>'
+    assert render(compact_html(first)) == '<p title="a&amp;b">1</p><p title="a&amp;amp;b">2</p>'
+    assert render(compact_html(second)) == '<p title="a&amp;amp;b">2</p><p title="a&amp;b">1</p>'
+
+
+def test_top_level_list() -> None:
+    vdom = [VDOMNode('p', {}, ['a']), 'b', VDOMNode('p', {}, [])]
+    tree = CompactVDOM.from_vdom(vdom)
+    assert tree.to_vdom() == vdom
+    assert render(tree) == '<p>a</p>b<p></p>'
+
+
+def test_compact_html() -> None:
+    name = 'World'
+    classes = ['a', 'b']
+    tree = compact_html('<div class={classes} id="main"><p>Hello {name}</p><hr /></div>')
+    assert isinstance(tree, CompactVDOM)
+    expected = html('<div class={classes} id="main"><p>Hello {name}</p><hr /></div>')
+    assert tree.to_vdom() == expected
+    assert render(tree) == render(expected)
+
+
+def test_nested_in_vdom() -> None:
+    inner = CompactVDOM.from_vdom(VDOMNode('li', {}, ['1 < 2']))
+    assert render(VDOMNode('ul', {}, [inner])) == '<ul><li>1 &lt; 2</li></ul>'  # type: ignore
+
+
+@injectable
+class Badge:
+    def __call__(self) -> VDOM:
+        return html('<span>badge</span>')
+
+
+def test_component_kept_as_object() -> None:
+    tree = compact_html('<div><{Badge} /></div>')
+    assert list(tree.tags)[1] == OBJECT
+    assert render(tree) == '<div><span>badge</span></div>'
+
+
+def test_component_with_children() -> None:
+    tree = compact_html('<div><{Badge}><p>x</p><//><i>after</i></div>')
+    assert list(tree.tags)[1] == OBJECT
+    node = tree.objects[0]
+    assert isinstance(node, VDOMNode)
+    assert node.tag is Badge  # type: ignore
+    assert node.children == [VDOMNode('p', {}, ['x'])]
+    assert render(tree) == render(html('<div><{Badge}><p>x</p><//><i>after</i></div>'))
+
+
+def test_htm_eval_compact_props() -> None:
+    ops = htm_parse(('<a href="/x-', '" title=t>link</a>'))
+    tree = htm_eval_compact(ops, ('1',))
+    assert render(tree) == '<a href="/x-1" title="t">link</a>'
+
+
+def test_raw_text_and_entities() -> None:
+    data = inline_json('a & b')
+    template = '<p>&copy; a & b</p><script>var d = {data};</script>'
+    tree = compact_html(template)
+    assert render(tree) == render(html(template))
+    assert render(tree) == '<p>&copy; a & b</p><script>var d = "a \\u0026 b";</script>'
+
+    year = '<2024>'
+    assert render(compact_html('<p title="&copy; {year}">x</p>')) == '<p title="&copy; &lt;2024&gt;">x</p>'
+
+    attack = '"; alert(1); //'
+    with pytest.raises(ValueError):
+        render(compact_html('<script>var d = "{attack}";</script>'))
+
+
+def test_caller_cache_registered() -> None:
+    own = TemplateCache('own-compact', compact_prepare.build)
+    render(htm_compact(cache=own)('<p>own</p>'))
+    assert cache_stats()['own-compact']['misses'] == 1
@@ -0,0 +1,158 @@
+import asyncio
+from dataclasses import dataclass
+
+from antidote import injectable
+
+from antidom import VDOM, Resource, html
+from antidom.aio import render_async
+from antidom.cache import cache_stats
+from antidom.component import Memoize, component
+from antidom.resource import resource_context
+from antidom.viewdom import Markup, render
+
+
+@dataclass
+class Page:
+    name: str | None
+    parent: Resource | None
+
+
+class Clock:
+    now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+clock = Clock()
+
+
+@component(memoize=Memoize(maxsize=2, ttl=10, clock=clock))
+@dataclass
+class Nav:
+    calls = 0
+
+    def __vdom__(self) -> VDOM:
+        Nav.calls += 1
+        return html('<nav>Home</nav>')
+
+
+@component(memoize=Memoize(as_string=True))
+@dataclass
+class Footer:
+    calls = 0
+
+    def __vdom__(self) -> VDOM:
+        Footer.calls += 1
+        return html('<footer>Bye</footer>')
+
+
+@injectable
+@dataclass
+class AsyncInner:
+    async def __vdom__(self) -> VDOM:
+        await asyncio.sleep(0)
+        return html('<b>inner</b>')
+
+
+@component(memoize=Memoize(as_string=True))
+@dataclass
+class Outer:
+    calls = 0
+
+    def __vdom__(self) -> VDOM:
+        Outer.calls += 1
+        return html('<div><{AsyncInner} /></div>')
+
+
+def test_memoized_component() -> None:
+    Nav.__memoize__.clear()  # type: ignore
+    Nav.calls = 0
+    hits = Nav.__memoize__.hits  # type: ignore
+    with resource_context(Page(name='one', parent=None)):
+        assert render(html('<div><{Nav} /><{Nav} /></div>')) == (
+            '<div><nav>Home</nav><nav>Home</nav></div>'
+        )
+        render(html('<{Nav} />'))
+    assert Nav.calls == 1
+    assert Nav.__memoize__.hits == hits + 2  # type: ignore
+
+
+def test_memoized_stats() -> None:
+    assert Nav.__memoize__.name == f'memoize:{__name__}.Nav'  # type: ignore
+    Nav.__memoize__.clear()  # type: ignore
+    render(html('<{Nav} />'))
+    stats = cache_stats()[Nav.__memoize__.name]  # type: ignore
+    assert (stats['maxsize'], stats['size']) == (2, 1)
+
+
+def test_memoized_by_props_and_resource() -> None:
+    Nav.__memoize__.clear()  # type: ignore
+    Nav.calls = 0
+    page = Page(name='one', parent=None)
+    with resource_context(page):
+        render(html('<{Nav} section="a" />'))
+        render(html('<{Nav} section="b" />'))
+    assert Nav.calls == 2
+    with resource_context(Page(name='two', parent=None)):
+        render(html('<{Nav} section="a" />'))
+    assert Nav.calls == 3
+    # Only two entries fit, the first one was evicted.
+    with resource_context(page):
+        render(html('<{Nav} section="a" />'))
+    assert Nav.calls == 4
+
+
+def test_memoized_ttl() -> None:
+    Nav.__memoize__.clear()  # type: ignore
+    Nav.calls = 0
+    render(html('<{Nav} />'))
+    clock.now += 5
+    render(html('<{Nav} />'))
+    assert Nav.calls == 1
+    clock.now += 10
+    render(html('<{Nav} />'))
+    assert Nav.calls == 2
+
+
+def test_memoized_unhashable_props() -> None:
+    Nav.__memoize__.clear()  # type: ignore
+    Nav.calls = 0
+    items = ['a']
+    render(html('<{Nav} items={items} />'))
+    render(html('<{Nav} items={items} />'))
+    assert Nav.calls == 2
+
+
+def test_memoized_as_string() -> None:
+    Footer.calls = 0
+    assert render(html('<{Footer} />')) == '<footer>Bye</footer>'
+    assert render(html('<{Footer} />')) == '<footer>Bye</footer>'
+    assert Footer.calls == 1
+    _, value = Footer.__memoize__.get(next(iter(Footer.__memoize__._entries)))  # type: ignore
+    assert isinstance(value, Markup)
+
+
+def test_memoized_async() -> None:
+    Nav.__memoize__.clear()  # type: ignore
+    Nav.calls = 0
+    hits = Nav.__memoize__.hits  # type: ignore
+    page = html('<{Nav} /><{Nav} />')
+    with resource_context(Page(name='one', parent=None)):
+        assert asyncio.run(render_async(page)) == '<nav>Home</nav><nav>Home</nav>'
+        assert asyncio.run(render_async(page)) == '<nav>Home</nav><nav>Home</nav>'
+    # Nav renders synchronously, so the first call is stored before the
+    # second one looks it up.
+    assert Nav.calls == 1
+    assert Nav.__memoize__.hits == hits + 3  # type: ignore
+
+
+def test_memoized_as_string_async_children() -> None:
+    Outer.__memoize__.clear()  # type: ignore
+    Outer.calls = 0
+    page = html('<{Outer} />')
+    assert asyncio.run(render_async(page)) == '<div><b>inner</b></div>'
+    assert asyncio.run(render_async(page)) == '<div><b>inner</b></div>'
+    assert Outer.calls == 1
+    _, value = Outer.__memoize__.get(next(iter(Outer.__memoize__._entries)))  # type: ignore
+    assert value == '<div><b>inner</b></div>'
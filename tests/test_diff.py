@@ -0,0 +1,119 @@
+import json
+import random
+
+from antidote import injectable
+
+from antidom import VDOM, html
+from antidom.diff import (
+    INSERT, MOVE, PROPS, REMOVE, REPLACE, TEXT, apply_patches, diff, dump_patches, expand,
+)
+from antidom.compact import CompactVDOM
+from antidom.viewdom import VDOMNode, render
+
+
+def item(key: int, text: str = '') -> VDOMNode:
+    return VDOMNode('li', {'key': key}, [text or f'item {key}'])
+
+
+def test_same_tree() -> None:
+    name = 'World'
+    assert diff(html('<p>Hello {name}</p>'), html('<p>Hello {name}</p>')) == []
+
+
+def test_text_and_props() -> None:
+    old = VDOMNode('div', {'class': ['a', 'b'], 'hidden': True}, ['One', VDOMNode('b', {}, ['x'])])
+    new = VDOMNode('div', {'class': 'a b', 'id': 1}, ['Two', VDOMNode('b', {}, ['<y>'])])
+    assert diff(old, new) == [
+        (PROPS, (0,), {'id': '1'}, ('hidden',)),
+        (TEXT, (0, 0), 'Two'),
+        (TEXT, (0, 1, 0), '&lt;y&gt;'),
+    ]
+
+
+def test_replace_and_append() -> None:
+    old = [VDOMNode('p', {}, ['a'])]
+    new = [VDOMNode('div', {}, ['a']), 'tail']
+    assert diff(old, new) == [(REPLACE, (0,), new[0]), (INSERT, (1,), 'tail')]
+
+
+def test_keyed_moves() -> None:
+    old = VDOMNode('ul', {}, [item(1), item(2), item(3)])
+    new = VDOMNode('ul', {}, [item(3), item(1, 'changed'), item(4)])
+    patches = diff(old, new)
+    assert patches == [
+        (REMOVE, (0, 1)),
+        (MOVE, (0, 1), 0),
+        (TEXT, (0, 1, 0), 'changed'),
+        (INSERT, (0, 2), item(4)),
+    ]
+
+
+def test_shared_subtree_skipped() -> None:
+    shared = VDOMNode('footer', {}, ['static'])
+    patches = diff([shared, 'a'], [shared, 'b'])
+    assert patches == [(TEXT, (1,), 'b')]
+
+
+@injectable
+class Counter:
+    count = 0
+
+    def __call__(self) -> VDOM:
+        count = str(Counter.count)
+        return html('<span>{count}</span>')
+
+
+def test_components_expanded() -> None:
+    page = html('<div><{Counter} /></div>')
+    Counter.count = 1
+    old = expand(page)
+    Counter.count = 2
+    assert diff(old, page) == [(TEXT, (0, 0, 0), '2')]
+
+
+def test_compact_compared_as_markup() -> None:
+    rows = CompactVDOM.from_vdom(VDOMNode('tr', {}, ['a']))
+    page = html('<table>{rows}</table>')
+    assert diff(page, page) == []
+    changed = html('<table>{CompactVDOM.from_vdom(VDOMNode("tr", {}, ["b"]))}</table>')
+    assert diff(page, changed) == [(TEXT, (0, 0), '<tr>b</tr>')]
+
+
+def test_dump_patches() -> None:
+    patches = [
+        (INSERT, (0, 2), item(4)),
+        (PROPS, (0,), {'id': '1', 'hidden': True}, ('class',)),
+        (REMOVE, (1,)),
+    ]
+    assert json.loads(dump_patches(patches)) == [
+        ['i', [0, 2], '<li key="4">item 4</li>'],
+        ['p', [0], {'id': '1', 'hidden': True}, ['class']],
+        ['d', [1]],
+    ]
+
+
+def random_children(rng: random.Random, depth: int) -> list[str | VDOMNode]:
+    children: list[str | VDOMNode] = []
+    keyed = rng.random() < 0.5
+    keys = rng.sample(range(8), rng.randrange(5))
+    for key in keys:
+        if depth and rng.random() < 0.7:
+            props: dict[str, object] = {'class': rng.choice(['a', 'b', None])}
+            if keyed:
+                props['key'] = key
+            tag = rng.choice(['div', 'p'])
+            children.append(VDOMNode(tag, props, random_children(rng, depth - 1)))
+        else:
+            children.append(rng.choice(['x', 'y', '<z>']))
+    return children
+
+
+def test_random_trees() -> None:
+    """Applying the patches to the old tree always gives the new one."""
+    rng = random.Random(1234)
+    for _ in range(500):
+        old = random_children(rng, 3)
+        new = random_children(rng, 3)
+        patched = apply_patches(old, diff(old, new))
+        assert render(patched) == render(new)
+        dump_patches(diff(old, new))
@@ -57,3 +57,9 @@ def test_view_component_resource_operator() -> None:
     from antidom.examples.view_component_resource_operator import main
     actual, expected = main()
     assert actual == expected
+
+
+def test_static_site() -> None:
+    from antidom.examples.static_site import main
+    actual, expected = main()
+    assert actual == expected
@@ -0,0 +1,87 @@
+from dataclasses import dataclass
+
+from antidom import VDOM, Resource, html, view
+from antidom.cache import cache_stats
+from antidom.fragment import FragmentCache, fragments, render_view
+
+
+@dataclass
+class Product:
+    name: str | None
+    parent: Resource | None
+    etag: int = 1
+
+
+@view(context=Product)
+@dataclass
+class ProductView:
+    calls = 0
+
+    def __vdom__(self) -> VDOM:
+        ProductView.calls += 1
+        return html('<h1>Product</h1>')
+
+
+def test_render_view_cached() -> None:
+    cache = FragmentCache()
+    ProductView.calls = 0
+    product = Product(name='p', parent=None)
+    assert render_view(product, cache) == '<h1>Product</h1>'
+    assert render_view(product, cache) == '<h1>Product</h1>'
+    assert ProductView.calls == 1
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    # Another resource, even if equal, is cached separately.
+    render_view(Product(name='p', parent=None), cache)
+    assert ProductView.calls == 2
+
+
+def test_render_view_etag() -> None:
+    cache = FragmentCache()
+    ProductView.calls = 0
+    product = Product(name='p', parent=None)
+    render_view(product, cache)
+    product.etag = 2
+    render_view(product, cache)
+    render_view(product, cache)
+    assert ProductView.calls == 2
+    assert cache.size == len('<h1>Product</h1>')
+
+
+def test_invalidate() -> None:
+    cache = FragmentCache()
+    ProductView.calls = 0
+    first, second = Product(name='1', parent=None), Product(name='2', parent=None)
+    render_view(first, cache)
+    render_view(second, cache)
+    cache.invalidate(first)
+    render_view(first, cache)
+    render_view(second, cache)
+    assert ProductView.calls == 3
+
+    cache.invalidate_type(Product)
+    assert cache.size == 0
+    render_view(second, cache)
+    assert ProductView.calls == 4
+
+
+def test_size_bound() -> None:
+    fragment = '<h1>Product</h1>'
+    cache = FragmentCache(max_size=len(fragment) * 2)
+    products = [Product(name=str(i), parent=None) for i in range(3)]
+    for product in products:
+        render_view(product, cache)
+    assert cache.evictions == 1
+    assert cache.size == len(fragment) * 2
+
+
+def test_shared_cache_stats() -> None:
+    fragments.clear()
+    hits = fragments.hits
+    product = Product(name='p', parent=None)
+    render_view(product)
+    render_view(product)
+    stats = cache_stats()['fragments']
+    assert stats['size'] == len('<h1>Product</h1>')
+    assert stats['hits'] == hits + 1
+    fragments.invalidate(product)
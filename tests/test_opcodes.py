@@ -0,0 +1,88 @@
+import pytest
+
+from antidom.opcodes import CHILD, CLOSE, OPEN, PROP, PROP_VALUE, Program, assemble, evaluate
+from antidom.tagged import split
+from antidom.viewdom import Markup, VDOMNode, htm_mark_static, htm_eval, htm_hoist, htm_parse, join_parts
+
+TEMPLATES = [
+    '<p class="greeting">Hello {name}</p>',
+    '<ul>{items}</ul><hr />',
+    '<a href="/x-{name}-y" hidden data-id={name}>{name}</a>',
+    '<{name}>child<//>',
+    '<div class=a><p class=a>a</p><p class=a>1</p></div>',
+    'just text',
+]
+
+
+def parse(template: str) -> list[object]:
+    strings, _ = split(template)
+    return htm_parse(strings)
+
+
+@pytest.mark.parametrize('template', TEMPLATES)
+def test_round_trip(template: str) -> None:
+    ops = parse(template)
+    program = assemble(ops)
+    assert program.ops() == ops
+    assert Program.loads(program.dumps()) == program
+
+
+@pytest.mark.parametrize('template', TEMPLATES)
+def test_evaluate_matches_htm_eval(template: str) -> None:
+    ops = parse(template)
+    values = ('World', 'x', 'y', 'z')
+    assert evaluate(VDOMNode, assemble(ops), values) == htm_eval(VDOMNode, ops, values)
+
+
+def test_evaluate_joins_marked_parts() -> None:
+    ops = htm_mark_static(parse('<p title="&copy; {x}">a</p>'))
+    expected = htm_eval(VDOMNode, ops, ('<b>',))
+    assert evaluate(VDOMNode, assemble(ops), ('<b>',), join_parts) == expected
+    assert expected.props['title'] == Markup('&copy; &lt;b&gt;')  # type: ignore
+
+
+def test_layout() -> None:
+    program = assemble(parse('<p class="a" id={x}>a</p>'))
+    assert len(program) == 5
+    assert list(program.code) == [
+        OPEN, 0, 0,
+        PROP, 1, 2,
+        PROP_VALUE, 3, 0,
+        CHILD, 2, 0,
+        CLOSE, 0, 0,
+    ]
+    # The text "a" is used as a value and a child, but stored once.
+    assert program.constants == ('p', 'class', 'a', 'id')
+    assert program.code.typecode == 'B'
+
+
+def test_large_operands() -> None:
+    ops = [('CHILD', True, 70000)]
+    program = assemble(ops)
+    assert program.code.typecode == 'i'
+    assert Program.loads(program.dumps()).ops() == ops
+
+
+def test_constants_keep_types() -> None:
+    program = assemble([
+        ('OPEN', False, 'input'),
+        ('PROP_SINGLE', 'checked', False, True),
+        ('PROP_SINGLE', 'value', False, '1'),
+        ('CLOSE',),
+    ])
+    assert program.constants == ('input', 'checked', True, 'value', '1')
+
+
+def test_hoisted_ops() -> None:
+    ops = htm_hoist(VDOMNode, htm_mark_static(parse('<div><p>static</p>{name}</div>')))
+    program = assemble(ops)
+    assert evaluate(VDOMNode, program, ('x',)) == htm_eval(VDOMNode, ops, ('x',))
+    # Nodes can't be marshalled.
+    with pytest.raises(ValueError):
+        program.dumps()
+
+
+def test_loads_version() -> None:
+    import marshal
+    with pytest.raises(ValueError):
+        Program.loads(marshal.dumps((0, 'little', 'B', b'', ())))
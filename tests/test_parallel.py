@@ -0,0 +1,93 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+from antidote import injectable
+
+from antidom import VDOM, Resource, html
+from antidom.parallel import render_gen_parallel, render_parallel
+from antidom.resource import get_resource, resource_context
+from antidom.viewdom import VDOMNode, render
+
+
+@dataclass
+class Page:
+    name: str | None
+    parent: Resource | None
+
+
+@injectable(singleton=False)
+@dataclass
+class SlowNav:
+    def __call__(self) -> VDOM:
+        time.sleep(0.1)
+        name = get_resource().name
+        return html('<nav>{name}</nav>')
+
+
+# Only lets its parties through once all of them wait on it, so the regions
+# of the layout fail to render unless they are rendered at the same time.
+LAYOUT_BARRIER = threading.Barrier(2, timeout=5)
+
+
+@injectable(singleton=False)
+@dataclass
+class LayoutNav:
+    def __call__(self) -> VDOM:
+        LAYOUT_BARRIER.wait()
+        name = get_resource().name
+        return html('<nav>{name}</nav>')
+
+
+@injectable(singleton=False)
+@dataclass
+class LayoutArticle:
+    def __call__(self) -> VDOM:
+        LAYOUT_BARRIER.wait()
+        thread = threading.current_thread().name
+        return html('<article data-thread={thread}>Article</article>')
+
+
+@injectable(singleton=False)
+@dataclass
+class Layout:
+    def __call__(self) -> VDOM:
+        return html('<main><{LayoutNav} /><hr /><{LayoutArticle} /></main>')
+
+
+def test_render_parallel_layout() -> None:
+    LAYOUT_BARRIER.reset()
+    with resource_context(Page(name='home', parent=None)):
+        result = render_parallel(html('<{Layout} />'))
+    assert result.startswith('<main><nav>home</nav><hr/><article data-thread="')
+    assert result.endswith('">Article</article></main>')
+    # Rendered on a worker, at the same time as the navigation.
+    assert 'MainThread' not in result
+
+
+def test_render_parallel_matches_render() -> None:
+    page = VDOMNode('div', {'class': 'a'}, ['Hello ', VDOMNode('b', {}, ['<you>'])])
+    assert render_parallel(page) == render(page)
+    assert render_parallel([page, 'tail']) == render([page, 'tail'])
+
+
+def test_render_parallel_requests() -> None:
+    """Each request renders its regions with its own resource."""
+    page = html('<{SlowNav} /><{SlowNav} />')
+
+    def handle(name: str) -> str:
+        with resource_context(Page(name=name, parent=None)):
+            return render_parallel(page, regions)
+
+    with ThreadPoolExecutor(max_workers=8) as regions:
+        with ThreadPoolExecutor(max_workers=4) as requests:
+            results = list(requests.map(handle, [f'p{i}' for i in range(8)]))
+    assert results == [f'<nav>p{i}</nav><nav>p{i}</nav>' for i in range(8)]
+
+
+def test_render_gen_parallel_order() -> None:
+    page = html('<{SlowNav} /><p>between</p><{SlowNav} />')
+    with resource_context(Page(name='x', parent=None)):
+        chunks = list(render_gen_parallel(page, max_workers=2))
+    assert "".join(chunks) == '<nav>x</nav><p>between</p><nav>x</nav>'
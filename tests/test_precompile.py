@@ -0,0 +1,67 @@
+import marshal
+from pathlib import Path
+
+import pytest
+
+from antidom.cache import cache_stats, clear_caches, configure_caches
+from antidom.precompile import dump_cache, find_templates, load_cache, main, precompile
+from antidom.viewdom import VDOMNode, html, render_html
+
+
+def test_find_templates() -> None:
+    templates = set(find_templates('antidom.examples'))
+    assert ('html', '<p>Hello World</p>') in templates
+    assert ('html', '<{Heading} />') in templates
+    # Interpolated f-strings are only known at runtime.
+    assert not any('self.' in template for (_, template) in templates)
+
+
+def test_round_trip(tmp_path: Path) -> None:
+    path = tmp_path / 'templates.cache'
+    dump_cache(precompile(iter([
+        ('html', '<p class="a">{name}</p>'),
+        ('render_html', '<b>{name}</b>'),
+    ])), path)
+
+    clear_caches()
+    assert load_cache(path) == 2
+    name = 'World'
+    assert html('<p class="a">{name}</p>') == VDOMNode('p', {'class': 'a'}, ['World'])
+    assert render_html('<b>{name}</b>') == '<b>World</b>'
+    stats = cache_stats()
+    assert stats['split']['misses'] == 0
+    assert stats['htm']['misses'] == 0
+    assert stats['htm_render']['misses'] == 0
+
+
+def test_caches_grow_to_fit(tmp_path: Path) -> None:
+    path = tmp_path / 'templates.cache'
+    dump_cache(precompile(iter(('html', f'<p>{i}</p>') for i in range(20))), path)
+
+    configure_caches(maxsize=4)
+    try:
+        clear_caches()
+        assert load_cache(path) == 20
+        assert cache_stats()['htm']['size'] == 20
+        assert cache_stats()['htm']['evictions'] == 0
+
+        configure_caches(maxsize=0)
+        clear_caches()
+        assert load_cache(path) == 0
+    finally:
+        configure_caches(maxsize=128)
+
+
+def test_version_mismatch(tmp_path: Path) -> None:
+    path = tmp_path / 'templates.cache'
+    path.write_bytes(marshal.dumps((('antidom-templates', 0, 'other'), [])))
+    with pytest.warns(UserWarning, match='ignoring'):
+        assert load_cache(path) == 0
+
+
+def test_main(tmp_path: Path, capsys: pytest.CaptureFixture[str]) -> None:
+    path = tmp_path / 'templates.cache'
+    assert main(['antidom.examples', '-o', str(path)]) == 0
+    assert 'templates to' in capsys.readouterr().out
+    clear_caches()
+    assert load_cache(path) > 0
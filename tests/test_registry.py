@@ -0,0 +1,99 @@
+from dataclasses import dataclass
+
+import pytest
+from antidote.core.exceptions import DependencyNotFoundError
+
+from antidom import VDOM, Resource, html, view
+from antidom.resource import resource_context
+from antidom.view import get_view, views
+
+
+@dataclass
+class Shelf:
+    name: str | None
+    parent: Resource | None
+
+
+class SpecialShelf(Shelf):
+    pass
+
+
+@dataclass
+class Unviewed:
+    name: str | None
+    parent: Resource | None
+
+
+@view(context=Shelf)
+@dataclass
+class ShelfView:
+    def __vdom__(self) -> VDOM:
+        return html('<p>Shelf</p>')
+
+
+def test_get_cached() -> None:
+    views.clear()
+    assert type(views.get(Shelf)) is ShelfView
+    assert views._classes == {Shelf: ShelfView}
+    assert type(views.get(Shelf)) is ShelfView
+    with resource_context(Shelf(name='s', parent=None)):
+        assert isinstance(get_view(), ShelfView)
+
+
+def test_get_subclass_falls_back() -> None:
+    assert type(views.get(SpecialShelf)) is ShelfView
+    assert views._classes[SpecialShelf] is ShelfView
+    with resource_context(SpecialShelf(name='s', parent=None)):
+        assert isinstance(get_view(), ShelfView)
+
+
+def test_get_missing() -> None:
+    with pytest.raises(DependencyNotFoundError):
+        views.get(Unviewed)
+    assert Unviewed not in views._classes
+
+
+def test_registering_clears() -> None:
+    views.get(Shelf)
+
+    @dataclass
+    class Box:
+        name: str | None
+        parent: Resource | None
+
+    @view(context=Box)
+    @dataclass
+    class BoxView:
+        def __vdom__(self) -> VDOM:
+            return html('<p>Box</p>')
+
+    assert views._classes == {}
+    assert type(views.get(Box)) is BoxView
+
+
+@dataclass
+class Counted:
+    name: str | None
+    parent: Resource | None
+
+
+@view(context=Counted)
+@dataclass
+class CountedView:
+    instances = 0
+
+    def __post_init__(self) -> None:
+        CountedView.instances += 1
+
+    def __vdom__(self) -> VDOM:
+        return html('<p>Counted</p>')
+
+
+def test_miss_builds_one_instance() -> None:
+    views.clear()
+    CountedView.instances = 0
+    with resource_context(Counted(name='c', parent=None)):
+        assert isinstance(get_view(), CountedView)
+        assert CountedView.instances == 1
+        assert isinstance(get_view(), CountedView)
+        assert CountedView.instances == 2
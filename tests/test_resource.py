@@ -1,9 +1,14 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
-from antidote import world
+from antidote import inject, world
 
-from antidom import Resource
-from antidom.resource import add_resource, get_resource
+from antidom import VDOM, Resource, html, view
+from antidom.resource import add_resource, get_resource, resource_context
+from antidom.view import get_view
+from antidom.viewdom import render
 
 
 @dataclass
@@ -12,6 +17,16 @@ class Customer:
     parent: Resource | None
 
 
+@view(context=Customer)
+@dataclass
+class CustomerView:
+    customer: Resource = inject.me()
+
+    def __vdom__(self) -> VDOM:
+        name = self.customer.name
+        return html('<p>{name}</p>')
+
+
 def test_request_resource() -> None:
     """Simulate different requests with a stateful provider."""
 
@@ -29,3 +44,44 @@ def test_request_resource() -> None:
         second_customer = Customer(name='Second Customer', parent=None)
         add_resource(second_customer)
         assert get_resource() == second_customer
+
+
+def test_resource_context_restores() -> None:
+    first = Customer(name='First', parent=None)
+    second = Customer(name='Second', parent=None)
+    with resource_context(first):
+        with resource_context(second):
+            assert get_resource() is second
+            assert render(get_view().__vdom__()) == '<p>Second</p>'
+        assert get_resource() is first
+        assert render(get_view().__vdom__()) == '<p>First</p>'
+    assert get_resource() is not first
+
+
+def render_customer(customer: Customer) -> str:
+    with resource_context(customer):
+        # Give other requests a chance to run in between.
+        time.sleep(0.001)
+        return render(get_view().__vdom__())
+
+
+def test_concurrent_threads() -> None:
+    customers = [Customer(name=f'c{i}', parent=None) for i in range(200)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(render_customer, customers))
+    assert results == [f'<p>c{i}</p>' for i in range(200)]
+
+
+def test_concurrent_tasks() -> None:
+    async def render_task(customer: Customer) -> str:
+        with resource_context(customer):
+            await asyncio.sleep(0.001)
+            this_view = get_view()
+            await asyncio.sleep(0)
+            return render(this_view.__vdom__())
+
+    async def main() -> list[str]:
+        customers = [Customer(name=f'c{i}', parent=None) for i in range(200)]
+        return await asyncio.gather(*(render_task(c) for c in customers))
+
+    assert asyncio.run(main()) == [f'<p>c{i}</p>' for i in range(200)]
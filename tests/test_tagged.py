@@ -0,0 +1,115 @@
+import random
+
+import pytest
+
+from antidom.tagged import ParseError, compile_exprs, split, split_tokenize, tag
+from antidom.viewdom import html, VDOMNode
+
+
+@tag
+def collect(strings: tuple[str, ...], values: tuple[object, ...]) -> object:
+    return strings, values
+
+
+def test_caller_locals() -> None:
+    """Expressions are evaluated in the immediate caller's frame."""
+    name = 'World'
+    assert collect('Hello {name}!') == (('Hello ', '!'), ('World',))
+
+
+def test_caller_globals() -> None:
+    assert collect('{VDOMNode.__name__}') == (('', ''), ('VDOMNode',))
+
+
+def test_explicit_namespace() -> None:
+    """An explicit namespace skips the frame lookup entirely."""
+    name = 'Ignored'
+    namespace = dict(name='World')
+    assert collect('Hello {name}!', namespace) == (('Hello ', '!'), ('World',))
+    assert namespace == dict(name='World')
+    assert name == 'Ignored'
+
+
+def test_explicit_namespace_builtins() -> None:
+    assert collect('{len(items)}', dict(items=[1, 2])) == (('', ''), (2,))
+
+
+def test_no_expressions() -> None:
+    assert collect('Hello') == (('Hello',), ())
+
+
+def test_html_namespace() -> None:
+    result = html('<p>{greeting}</p>', dict(greeting='Hi'))
+    assert result == VDOMNode('p', {}, ['Hi'])
+
+
+def test_many_expressions() -> None:
+    a, b, c = 1, 2, 3
+    assert collect('{a}{b}-{c}{a + b + c}') == (('', '', '-', '', ''), (1, 2, 3, 6))
+
+
+def test_expression_with_comment() -> None:
+    value = 1
+    assert collect('{value # a comment\n}!') == (('', '!'), (1,))
+
+
+def test_compile_exprs() -> None:
+    code = compile_exprs(('x', 'x * 2', '(x,)'))
+    assert eval(code, {}, dict(x=2)) == (2, 4, (2,))
+
+
+def test_compile_exprs_rejects_escape() -> None:
+    """An expression can't close its own parentheses in the combined code."""
+    with pytest.raises(SyntaxError):
+        compile_exprs(('x), (y',))
+
+
+EXPR_PIECES = [
+    'x', ' y', 'a + b', ' ', '  ', 'f(1, 2)', "'}'", '"{"', "'''a}'''", '"""b{"""',
+    "r'\\'", "'a\\'b'", '{1: 2}[1]', '{x}', "f'{a}'", 'x if y else z', '\t', '\n',
+    '# comment\n', '(\n1)', '[1,\n 2]', 'x:>3', 'x!r', '\\\n',
+]
+TEXT_PIECES = ['', 'a', ' ', '\n', '<p>', '{{', '}}', 'é', "isn't", '"q"']
+
+
+def random_template(rng: random.Random) -> str:
+    parts = [rng.choice(TEXT_PIECES)]
+    for _ in range(rng.randrange(4)):
+        expr = ''.join(rng.choice(EXPR_PIECES) for _ in range(rng.randrange(1, 4)))
+        parts.append('{' + expr + '}')
+        parts.append(rng.choice(TEXT_PIECES))
+    return ''.join(parts)
+
+
+def outcome(string: str) -> object:
+    try:
+        return split_tokenize(string)
+    except Exception as exc:
+        return type(exc)
+
+
+@pytest.mark.parametrize('seed', range(20))
+def test_split_matches_tokenize(seed: int) -> None:
+    """The scanner gives the same result as the tokenize based parser."""
+    rng = random.Random(seed)
+    for _ in range(100):
+        template = random_template(rng)
+        expected = outcome(template)
+        if isinstance(expected, type):
+            with pytest.raises(expected):
+                split(template)
+        else:
+            assert split(template) == expected, template
+
+
+def test_split_non_ascii_expression() -> None:
+    """Offsets are in characters, so non-ASCII inside expressions works."""
+    assert split("{'é'}{y}") == (('', '', ''), ("'é'", 'y'))
+    assert split_tokenize("{'é'}{y}") == split("{'é'}{y}")
+    assert split("{'é'}{x\n}") == (('', '', ''), ("'é'", 'x\n'))
+
+
+@pytest.mark.parametrize('template', ["{'é'}{x\n}", "{'é'\n + 'ü'}é{x}", "é{x\t}{'ü'}"])
+def test_tokenize_fallback_per_expression(template: str) -> None:
+    """Only the expression scan_expr can't handle is tokenized."""
+    assert split(template) == split_tokenize(template)
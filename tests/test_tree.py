@@ -0,0 +1,68 @@
+import pytest
+
+from antidom.examples.static_site import Document, Folder
+from antidom.resource import get_resource
+from antidom.tree import ResourceTree, normalize_path
+from antidom.view import get_view
+from antidom.viewdom import render
+
+
+def make_tree() -> tuple[ResourceTree, Folder, Folder, Document]:
+    root = Folder(name=None, parent=None)
+    docs = Folder(name='docs', parent=root)
+    about = Document(name='about', parent=docs, title='About')
+    # Adding a leaf indexes its ancestors too.
+    return ResourceTree([about]), root, docs, about
+
+
+def test_normalize_path() -> None:
+    assert normalize_path('') == '/'
+    assert normalize_path('docs//about/') == '/docs/about'
+
+
+def test_find() -> None:
+    tree, root, docs, about = make_tree()
+    assert len(tree) == 3
+    assert tree.find('/') is root
+    assert tree.find('/docs/about') is about
+    assert tree.find('docs/about/') is about
+    assert tree.get('/missing') is None
+    with pytest.raises(KeyError):
+        tree.find('/docs/missing')
+
+
+def test_lineage_and_children() -> None:
+    tree, root, docs, about = make_tree()
+    assert tree.path(about) == '/docs/about'
+    assert tree.lineage(about) == (root, docs, about)
+    assert tree.children(root) == (docs,)
+    assert tree.children(about) == ()
+
+
+def test_add_and_remove() -> None:
+    tree, root, docs, about = make_tree()
+    news = Folder(name='news', parent=root)
+    assert tree.add(news) == '/news'
+    assert tree.children(root) == (docs, news)
+
+    # Equal but distinct resources can't share a path.
+    with pytest.raises(ValueError):
+        tree.add(Folder(name='news', parent=root))
+
+    tree.remove(docs)
+    assert len(tree) == 2
+    assert about not in tree
+    assert tree.get('/docs/about') is None
+    assert tree.children(root) == (news,)
+
+    # The path is free again.
+    other = Folder(name='docs', parent=root)
+    assert tree.add(other) == '/docs'
+    assert tree.find('/docs') is other
+
+
+def test_resource_context() -> None:
+    tree, root, docs, about = make_tree()
+    with tree.resource_context('/docs/about'):
+        assert get_resource() is about
+        assert render(get_view().__vdom__()) == '<article><h1>About</h1></article>'
@@ -0,0 +1,376 @@
+import random
+from typing import Any, Callable
+
+import pytest
+
+from antidom.tagged import ParseError, split
+from antidom.viewdom import (
+    ATTRIBUTE_CACHE,
+    Markup,
+    TAG_STRINGS,
+    VDOMNode,
+    encode_attribute,
+    encode_prop,
+    escape,
+    flatten,
+    htm_compile,
+    htm_compile_string,
+    htm_eval,
+    htm_hoist,
+    htm_parse,
+    htm_parse_scanner,
+    inline_json,
+    html,
+    render,
+    render_chunks,
+    render_stream,
+    tag_strings,
+    render_html,
+)
+
+TEMPLATES = [
+    ('Hello', ()),
+    ('<p>Hello World</p>', ()),
+    ('<div class="a" id=b hidden>{}</div>', ('x',)),
+    ('<p>{}</p><p>{} and {}</p>', ('one', 'two', 3)),
+    ('<{} title="a{}b{}" />', (lambda: None, 1, 2)),
+    ('<ul>\n  <li>{}</li>\n  <li>b</li>\n</ul>', (VDOMNode('b', {}, []),)),
+    ('<a href={} x="{}" y=\'{}\'>link</a>', ('/', 'y', 'z')),
+    ('<br/><hr />', ()),
+    ('<!-- comment --><p>after</p>', ()),
+    ('', ()),
+]
+
+
+def parts(template: str) -> tuple[str, ...]:
+    return split(template.replace('{}', '{x}'))[0]
+
+
+@pytest.mark.parametrize('template, values', TEMPLATES)
+def test_compiled_matches_eval(template: str, values: tuple[object, ...]) -> None:
+    ops = htm_parse(parts(template))
+    assert htm_compile(ops)(VDOMNode, values) == htm_eval(VDOMNode, ops, values)
+
+
+def test_compiled_spread_order() -> None:
+    """Props after a spread win, as with dict.update in htm_eval."""
+    ops = [
+        ('OPEN', False, 'p'),
+        ('PROP_SINGLE', 'a', False, '1'),
+        ('SPREAD', True, 0),
+        ('PROP_SINGLE', 'b', False, '2'),
+        ('CLOSE',),
+    ]
+    result = htm_compile(ops)(VDOMNode, (dict(a=0, b=0, c=0),))
+    assert result == VDOMNode('p', dict(a=0, b='2', c=0), [])
+    assert list(result.props) == ['a', 'b', 'c']
+
+
+def test_compiled_deep_nesting() -> None:
+    """Too deep for the Python parser, so falls back to interpreting."""
+    depth = 120
+    template = '<div>' * depth + 'x' + '</div>' * depth
+    ops = htm_parse((template,))
+    assert htm_compile(ops)(VDOMNode, ()) == htm_eval(VDOMNode, ops, ())
+
+
+def test_html_compiled() -> None:
+    name = 'World'
+    assert html('<p class="greeting">Hello {name}</p>') == VDOMNode(
+        'p', {'class': 'greeting'}, ['Hello ', 'World']
+    )
+
+
+STRING_TEMPLATES = [
+    ('Hello', ()),
+    ('<p class="a" hidden>Hello {}</p>', ('World',)),
+    ('<div><br/><hr></hr><span></span>{}</div>tail', (['a', 'b'],)),
+    ('<a href={} title="x{}y">{}</a>', ('/', 1, VDOMNode('b', {}, ['bold']))),
+    ('<p a=1 a=2>dup</p>', ()),
+    ('<{} class="x">{}<//>', ('section', 'body')),
+    ('<ul>\n  <li>{}</li>\n</ul>', (VDOMNode('br', {}, []),)),
+    ('', ()),
+]
+
+
+@pytest.mark.parametrize('template, values', STRING_TEMPLATES)
+def test_compiled_string_matches_render(template: str, values: tuple[object, ...]) -> None:
+    ops = htm_parse(parts(template))
+    expected = render(htm_eval(VDOMNode, ops, values))
+    assert htm_compile_string(ops)(values) == expected
+
+
+def test_compiled_string_spread() -> None:
+    ops = [
+        ('OPEN', False, 'p'),
+        ('SPREAD', True, 0),
+        ('CLOSE',),
+    ]
+    assert htm_compile_string(ops)(({},)) == '<p></p>'
+    assert htm_compile_string(ops)((dict(a=1),)) == '<p a="1"></p>'
+
+
+def test_render_html() -> None:
+    name = 'World'
+    assert render_html('<p class="greeting">Hello {name}</p>') == (
+        '<p class="greeting">Hello World</p>'
+    )
+
+
+@pytest.mark.parametrize('template, values', TEMPLATES)
+def test_hoisted_matches_eval(template: str, values: tuple[object, ...]) -> None:
+    ops = htm_parse(parts(template))
+    hoisted = htm_hoist(VDOMNode, ops)
+    assert htm_eval(VDOMNode, hoisted, values) == htm_eval(VDOMNode, ops, values)
+    assert htm_compile(hoisted)(VDOMNode, values) == htm_eval(VDOMNode, ops, values)
+
+
+def test_hoisted_ops() -> None:
+    ops = htm_parse(('<div><p class="a">static <b>bold</b></p><p>', '</p></div>'))
+    hoisted = htm_hoist(VDOMNode, ops)
+    static = VDOMNode('p', {'class': 'a'}, ['static ', VDOMNode('b', {}, ['bold'])])
+    assert hoisted == [
+        ('OPEN', False, 'div'),
+        ('CHILD', False, static),
+        ('OPEN', False, 'p'),
+        ('CHILD', True, 0),
+        ('CLOSE',),
+        ('CLOSE',),
+    ]
+
+
+def test_html_shares_static_subtrees() -> None:
+    def page(name: str) -> VDOMNode:
+        return html('<div><nav><a href="/">Home</a></nav><p>{name}</p></div>')  # type: ignore
+
+    first, second = page('a'), page('b')
+    assert first.children[0] is second.children[0]
+    assert first.children[1] == VDOMNode('p', {}, ['a'])
+    assert second.children[1] == VDOMNode('p', {}, ['b'])
+    assert html('<p>static</p>') is html('<p>static</p>')
+
+
+def test_render_chunks() -> None:
+    rows = [VDOMNode('li', {}, [str(i)]) for i in range(100)]
+    page = VDOMNode('ul', {'class': 'rows'}, rows)  # type: ignore
+    chunks = list(render_chunks(page, chunk_size=64))
+    assert ''.join(chunks) == render(page)
+    assert len(chunks) > 1
+    assert all(len(chunk) >= 64 for chunk in chunks[:-1])
+
+
+def test_render_chunks_small() -> None:
+    page = VDOMNode('p', {}, ['Hello'])
+    assert list(render_chunks(page)) == ['<p>Hello</p>']
+    assert list(render_chunks([])) == []
+
+
+def test_render_stream() -> None:
+    page = VDOMNode('p', {}, ['é'])
+    assert b''.join(render_stream(page, chunk_size=1)) == '<p>é</p>'.encode()
+
+
+def nested(depth: int) -> VDOMNode:
+    node = VDOMNode('i', {}, ['x'])
+    for _ in range(depth):
+        node = VDOMNode('b', {}, [node])
+    return node
+
+
+def test_render_deep_tree() -> None:
+    """Deeper than the recursion limit."""
+    depth = 5000
+    result = render(nested(depth))
+    assert result == '<b>' * depth + '<i>x</i>' + '</b>' * depth
+
+
+def test_flatten_deep_lists() -> None:
+    value: list[object] = ['x']
+    for _ in range(5000):
+        value = [value, 'y']
+    assert list(flatten(value)) == ['x'] + ['y'] * 5000  # type: ignore
+
+
+def test_render_nested_lists_and_components() -> None:
+    class Fragment:
+        def __vdom__(self) -> list[VDOMNode]:
+            return [VDOMNode('a', {}, []), VDOMNode('br', {}, [])]
+
+    class Nothing:
+        def __vdom__(self) -> None:
+            return None
+
+    nested: Any = ['c', ['d']]
+    value: list[Any] = ['a', ['b', [VDOMNode('p', {'x': 1}, nested)]], Fragment(), Nothing()]
+    assert render(value) == 'ab<p x="1">cd</p><a></a><br/>'
+
+
+def test_render_unknown_value() -> None:
+    with pytest.raises(ValueError):
+        render([1])  # type: ignore
+    with pytest.raises(ValueError):
+        list(flatten([b'x']))  # type: ignore
+
+
+def test_escape() -> None:
+    assert escape('plain text') == 'plain text'
+    assert escape('<a href="x">Tom & Jerry\'s</a>') == (
+        '&lt;a href=&#34;x&#34;&gt;Tom &amp; Jerry&#39;s&lt;/a&gt;'
+    )
+    assert escape(42) == '42'
+
+
+def test_escape_markup() -> None:
+    assert escape(Markup('<b>safe</b>')) == '<b>safe</b>'
+
+    class Html:
+        def __html__(self) -> str:
+            return '<i>also safe</i>'
+
+    assert escape(Html()) == '<i>also safe</i>'
+
+
+def test_render_escapes_values() -> None:
+    text = '<script>'
+    title = '"quoted"'
+    result = render(html('<p title={title}>{text}</p>'))
+    assert result == '<p title="&#34;quoted&#34;">&lt;script&gt;</p>'
+    trusted = Markup('<br/>')
+    assert render(html('<p>{trusted}</p>')) == '<p><br/></p>'
+
+
+def test_static_text_kept() -> None:
+    """Template text is HTML as written, kept as Markup so it isn't escaped."""
+    result = html('<p class="a&b">a > b & c</p>')
+    assert result == VDOMNode('p', {'class': 'a&b'}, ['a > b & c'])
+    assert isinstance(result.children[0], Markup)
+    assert isinstance(result.props['class'], Markup)
+    assert render(result) == '<p class="a&b">a > b & c</p>'
+    assert render_html('<p class="a&b">a > b & c</p>') == render(result)
+
+
+def test_static_entities() -> None:
+    template = '<p title="&copy; 2024">&copy; &amp; &#169;</p>'
+    assert render(html(template)) == template
+    assert render_html(template) == template
+
+
+def test_static_entities_around_values() -> None:
+    """Text around a value in an attribute is kept, only the value escaped."""
+    year = '<2024>'
+    expected = '<p title="&copy; &lt;2024&gt; &amp; co">x</p>'
+    assert render(html('<p title="&copy; {year} &amp; co">x</p>')) == expected
+    assert render_html('<p title="&copy; {year} &amp; co">x</p>') == expected
+    # Repeated names take the dict path of the string renderer.
+    assert render_html('<p title="a" title="&copy; {year} &amp; co">x</p>') == expected
+    assert render(html('<div><p title="&copy; {year} &amp; co">x</p></div>')) == f'<div>{expected}</div>'
+
+
+def test_static_attribute_quotes() -> None:
+    result = html("<p title='say \"hi\"'>x</p>")
+    assert result.props['title'] == 'say "hi"'  # type: ignore
+    assert render(result) == '<p title="say &#34;hi&#34;">x</p>'
+
+
+def test_inline_script_and_style() -> None:
+    template = (
+        '<script>var s = "x" && 1;</script>'
+        '<style>ul > li {{ content: "&"; }}</style>'
+    )
+    expected = template.replace('{{', '{').replace('}}', '}')
+    assert render(html(template)) == expected
+    assert render_html(template) == expected
+
+
+def test_inline_script_values() -> None:
+    """Data is inlined in raw text elements as JSON, plain strings are refused."""
+    data = inline_json({'a': 'b & c', 'end': '</script>'})
+    expected = '<script>var d = {"a": "b \\u0026 c", "end": "\\u003c/script\\u003e"};</script>'
+    assert render(html('<script>var d = {data};</script>')) == expected
+    assert render_html('<script>var d = {data};</script>') == expected
+
+    attack = '"; alert(1); //'
+    with pytest.raises(ValueError):
+        render(html('<script>var d = "{attack}";</script>'))
+    with pytest.raises(ValueError):
+        render_html('<script>var d = "{attack}";</script>')
+    assert render(html('<p>{attack}</p>')) == f'<p>{escape(attack)}</p>'
+
+
+def test_encode_attribute_types() -> None:
+    assert encode_attribute('hidden', True) == ' hidden'
+    assert encode_attribute('hidden', False) == ''
+    assert encode_attribute('title', None) == ''
+    assert encode_attribute('tabindex', 3) == ' tabindex="3"'
+    assert encode_attribute('class', ['a', None, 'b&c', False]) == ' class="a b&amp;c"'
+    assert encode_attribute('style', {'color': 'red', 'margin': None, 'top': 0}) == (
+        ' style="color: red; top: 0"'
+    )
+    assert encode_prop('title', '"x"') == 'title="&#34;x&#34;"'
+
+
+def test_render_attribute_types() -> None:
+    classes = ['card', 'active']
+    disabled = False
+    result = render(html('<button class={classes} disabled={disabled} tabindex={0}>Go</button>'))
+    assert result == '<button class="card active" tabindex="0">Go</button>'
+    assert render_html('<button class={classes} disabled={disabled} tabindex={0}>Go</button>') == result
+
+
+def test_static_attributes_serialized_at_parse() -> None:
+    html('<p data-parse-time="yes">x</p>')
+    assert ATTRIBUTE_CACHE['data-parse-time', 'yes'] == ' data-parse-time="yes"'
+    assert TAG_STRINGS['p'] == ('<p', '</p>', '></p>', False)
+
+
+def test_tag_strings() -> None:
+    assert tag_strings('BR') == ('<BR', '</BR>', '/>', False)
+    assert tag_strings('div') == ('<div', '</div>', '></div>', False)
+    assert tag_strings('SCRIPT') == ('<SCRIPT', '</SCRIPT>', '></SCRIPT>', True)
+
+
+def test_parse_interns_names() -> None:
+    first = htm_parse(("".join(['<d', 'iv cl', 'ass="bo', 'x">Sa', 'le</d', 'iv>']),))
+    second = htm_parse(('<div class="box">Sale</div>',))
+    assert first == second
+    # The same string objects, though sliced from different templates.
+    assert first[0][2] is second[0][2]
+    assert first[1][1] is second[1][1]
+    assert first[1][3] is second[1][3]
+    assert first[2][2] is second[2][2]
+
+
+def test_static_markup_shared() -> None:
+    first = html('<p class="note">Sale &</p>')
+    second = html('<b class="note">Sale &</b>')
+    assert isinstance(first, VDOMNode) and isinstance(second, VDOMNode)
+    assert first.props['class'] is second.props['class']
+    assert first.children[0] is second.children[0]
+    assert first.children[0] == 'Sale &'
+
+
+FUZZ_TOKENS = [
+    "<", ">", "/", "</", "<!--", "-->", "=", '"', "'", " ", "\n  ", "\t", "a", "div",
+    "x-y", "/>", "<//>", "<p>", "</p>", 'class="c"', "b=1", "text ", "{}",
+]
+
+
+def parse_outcome(parse: Callable[[tuple[str, ...]], list[Any]], strings: tuple[str, ...]) -> Any:
+    try:
+        return parse(strings)
+    except ParseError as exc:
+        return str(exc)
+
+
+def test_parse_matches_scanner() -> None:
+    """The single-pass parser gives the same ops, or error, as the scanner."""
+    rng = random.Random(42)
+    for _ in range(5000):
+        template = "".join(rng.choice(FUZZ_TOKENS) for _ in range(rng.randrange(25)))
+        strings = tuple(template.split("{}"))
+        assert parse_outcome(htm_parse, strings) == parse_outcome(htm_parse_scanner, strings)
+
+
+def test_parse_value_marker_in_text() -> None:
+    # Strings holding the marker itself are left to the scanner.
+    assert htm_parse(("<p>a\x00b</p>",)) == htm_parse_scanner(("<p>a\x00b</p>",))